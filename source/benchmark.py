@@ -0,0 +1,191 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1") #keep the output clean for scripts
+from solver import Solver
+from profiler import Profiler
+from scenes import SCENES
+from time import perf_counter
+import argparse
+import datetime
+import json
+import platform
+import sys
+
+
+#USER VARIABLES
+WORLD_WIDTH = 1920
+WORLD_HEIGHT = 1080
+DELTA_TIME = 1/100 #same as main.py
+SCALES = [100, 1000, 10000]
+PHASES = ["apply_gravity", "solve_collisions", "update_positions"] #Solver methods that get timed on their own
+GJK_EPA_SCENES = ["polygon_pile"] #also run with sat_max_points=0, SAT handles their polygon pairs by default so GJK/EPA would go unmeasured otherwise
+
+
+def time_phases(solver:Solver, totals:dict) -> None:
+    """Wraps the Solver's phase methods so every call adds its time onto the totals.
+
+    Args:
+        solver (Solver): Solver to time.
+        totals (dict): Phase name to total seconds, gets filled in as the solver runs.
+    """
+    for phase in PHASES:
+        totals[phase] = 0.0
+        method = getattr(solver, phase)
+
+        def timed(*arguments, method=method, phase=phase):
+            start = perf_counter()
+            method(*arguments)
+            totals[phase] += perf_counter() - start
+
+        setattr(solver, phase, timed) #instance attribute, the class is left alone
+
+
+def run_case(scene:str, scale:int, steps:int, broadphase:str, backend:str, subsets:int = 8, profile:bool = False, sat_max_points:int = 8) -> dict:
+    """Builds a scene at a scale and runs it for a fixed amount of steps.
+
+    Args:
+        scene (str): Name of the scene in SCENES.
+        scale (int): Amount of bodies the scene spawns.
+        steps (int): Amount of update() calls.
+        broadphase (str): Solver broadphase.
+        backend (str): Solver backend.
+        subsets (int, optional): Solver subsets. Defaults to 8.
+        profile (bool, optional): Also record per pair type timings with a Profiler, which slows the run down a bit. Defaults to False.
+        sat_max_points (int, optional): Solver sat_max_points, 0 sends every polygon pair through GJK/EPA. Defaults to 8.
+
+    Returns:
+        dict: Result of the case.
+    """
+    grav_objects, no_grav_objects = SCENES[scene](WORLD_WIDTH, WORLD_HEIGHT, scale)
+    profiler = Profiler(histograms=True) if profile else None
+    solver = Solver(grav_objects, no_grav_objects, subsets=subsets, broadphase=broadphase, backend=backend, profiler=profiler, sat_max_points=sat_max_points)
+
+    phases = {}
+    time_phases(solver, phases)
+
+    start = perf_counter()
+    for step in range(steps):
+        solver.update(DELTA_TIME)
+    total_seconds = perf_counter() - start
+
+    result = {
+        "scene": scene,
+        "scale": scale,
+        "broadphase": broadphase,
+        "backend": backend,
+        "subsets": subsets,
+        "sat_max_points": sat_max_points,
+        "steps": steps,
+        "objects": len(solver.all_objects),
+        "total_seconds": total_seconds,
+        "steps_per_second": steps / max(total_seconds, 1e-9),
+        "phases": phases
+    }
+
+    if profiler is not None:
+        result["profile"] = profiler.snapshot() #per call timings of every phase and pair type, in milliseconds
+
+    return result
+
+
+def case_key(result:dict) -> tuple:
+    return (result["scene"], result["scale"], result["broadphase"], result["backend"], result["subsets"], result.get("sat_max_points", 8)) #older results didn't record it and ran with the default
+
+
+def compare(baseline:dict, current:dict, threshold:float) -> list[str]:
+    """Finds the cases and phases of the current run that got slower than the baseline by more than the threshold.
+
+    Args:
+        baseline (dict): Stored benchmark results.
+        current (dict): New benchmark results.
+        threshold (float): Allowed slowdown, 0.1 lets things get 10% slower before they count.
+
+    Returns:
+        list[str]: A line for every regression.
+    """
+    baseline_cases = {case_key(result): result for result in baseline["results"]}
+    regressions = []
+
+    for result in current["results"]:
+        old_result = baseline_cases.get(case_key(result))
+        if old_result is None:
+            continue
+
+        name = "{0} x{1} ({2}, {3}, {4} subsets, sat_max_points {5})".format(*case_key(result))
+
+        slowdown = old_result["steps_per_second"] / max(result["steps_per_second"], 1e-9) - 1
+        if slowdown > threshold:
+            regressions.append(f"{name}: {old_result['steps_per_second']:.2f} -> {result['steps_per_second']:.2f} steps/s ({slowdown:+.1%} time)")
+
+        for phase, seconds in result["phases"].items():
+            old_seconds = old_result["phases"].get(phase)
+            if not old_seconds:
+                continue
+            #per step so runs with a different step count still line up
+            phase_slowdown = (seconds / result["steps"]) / (old_seconds / old_result["steps"]) - 1
+            if phase_slowdown > threshold:
+                regressions.append(f"{name} {phase}: {old_seconds/old_result['steps']*1000:.3f} -> {seconds/result['steps']*1000:.3f} ms/step ({phase_slowdown:+.1%})")
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks the Solver on the standard scenes and compares runs against a baseline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmark and write the results as JSON")
+    run_parser.add_argument("--output", default="benchmark.json", help="file to write the results into")
+    run_parser.add_argument("--scenes", nargs="+", default=sorted(SCENES), choices=sorted(SCENES))
+    run_parser.add_argument("--scales", nargs="+", type=int, default=SCALES, help="amounts of bodies to run every scene at")
+    run_parser.add_argument("--steps", type=int, default=20, help="amount of update() calls for every case")
+    run_parser.add_argument("--broadphase", default="spatial_hash", choices=["brute_force", "spatial_hash", "sweep_and_prune", "dynamic_tree"])
+    run_parser.add_argument("--backend", default="objects", choices=["objects", "arrays"])
+    run_parser.add_argument("--subsets", type=int, default=8)
+    run_parser.add_argument("--profile", action="store_true", help="also record p50/p95/p99 of every phase and pair type")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions of a run against a stored baseline")
+    compare_parser.add_argument("baseline", help="stored baseline JSON")
+    compare_parser.add_argument("current", help="new run JSON")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown before it counts as a regression")
+
+    arguments = parser.parse_args()
+
+    if arguments.command == "run":
+        results = []
+        for scene in arguments.scenes:
+            for scale in arguments.scales:
+                for sat_max_points in ([8, 0] if scene in GJK_EPA_SCENES else [8]):
+                    result = run_case(scene, scale, arguments.steps, arguments.broadphase, arguments.backend, arguments.subsets, arguments.profile, sat_max_points)
+                    results.append(result)
+                    name = f"{scene} x{scale}" + (" (GJK/EPA)" if sat_max_points == 0 else "")
+                    print(f"{name}: {result['steps_per_second']:.2f} steps/s  " + "  ".join(f"{phase}: {seconds/result['steps']*1000:.2f}ms" for phase, seconds in result["phases"].items()))
+
+        with open(arguments.output, "w") as file:
+            json.dump({
+                "meta": {
+                    "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    "world": [WORLD_WIDTH, WORLD_HEIGHT],
+                    "delta_time": DELTA_TIME
+                },
+                "results": results
+            }, file, indent=4)
+        print(f"Results written to {arguments.output}")
+
+    elif arguments.command == "compare":
+        with open(arguments.baseline) as file:
+            baseline = json.load(file)
+        with open(arguments.current) as file:
+            current = json.load(file)
+
+        regressions = compare(baseline, current, arguments.threshold)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+
+        if regressions:
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
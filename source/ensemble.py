@@ -0,0 +1,143 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1") #keep the output clean for scripts
+from solver import Solver
+from scenes import SCENES
+from time import perf_counter
+from typing import Callable, Iterator
+import argparse
+import itertools
+import json
+import multiprocessing
+
+
+#USER VARIABLES
+WORLD_WIDTH = 1920
+WORLD_HEIGHT = 1080
+DELTA_TIME = 1/100 #same as main.py
+SCENE_PARAMETERS = ["amount", "seed", "width", "height"] #grid parameters that go to the scene factory, "motor" sets motor speeds and everything else goes to the Solver
+
+
+def make_variants(grid:dict[str, list]) -> list[dict]:
+    """Expands a parameter grid into every combination of its values.
+
+    Args:
+        grid (dict[str, list]): Parameter name to the values to try.
+
+    Returns:
+        list[dict]: One dict of parameters per variant, in a fixed order.
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_variant(task:tuple[int, Callable, dict, int, float]) -> dict:
+    """Builds and steps one variant, runs inside a worker process.
+
+    Args:
+        task (tuple[int, Callable, dict, int, float]): Variant index, scene factory, parameters, amount of steps and delta time.
+
+    Returns:
+        dict: Summary metrics of the variant.
+    """
+    index, scene_factory, parameters, steps, delta_time = task
+    scene_arguments = {name: value for name, value in parameters.items() if name in SCENE_PARAMETERS}
+    solver_arguments = {name: value for name, value in parameters.items() if (name not in SCENE_PARAMETERS) and (name != "motor")}
+    width = scene_arguments.pop("width", WORLD_WIDTH)
+    height = scene_arguments.pop("height", WORLD_HEIGHT)
+
+    grav_objects, no_grav_objects = scene_factory(width, height, **scene_arguments)
+    if "motor" in parameters:
+        for object in grav_objects + no_grav_objects:
+            if getattr(object, "motor", 0): #keep the spin direction, swap the speed
+                object.motor = parameters["motor"] if object.motor > 0 else -parameters["motor"]
+
+    solver = Solver(grav_objects, no_grav_objects, **solver_arguments)
+    try:
+        start = perf_counter()
+        for step in range(steps):
+            solver.update(delta_time)
+        seconds = perf_counter() - start
+    finally: #variants with workers would leave their IslandPool running otherwise
+        solver.close()
+
+    moving = [object for object in solver.all_objects if not object.anchored]
+    speeds = [(object.position - object.last_position).length() * solver.subsets / delta_time for object in moving] #last_position is one subset back
+    escaped = sum(1 for object in moving if not ((0 <= object.position[0] <= width) and (0 <= object.position[1] <= height)))
+
+    return {
+        "index": index,
+        "parameters": parameters,
+        "steps": steps,
+        "objects": len(solver.all_objects),
+        "seconds": seconds,
+        "steps_per_second": steps / max(seconds, 1e-9),
+        "mean_speed": sum(speeds) / len(speeds) if speeds else 0.0,
+        "max_speed": max(speeds, default=0.0),
+        "mean_height": sum(height - object.position[1] for object in moving) / len(moving) if moving else 0.0,
+        "escaped": escaped
+    }
+
+
+def run_ensemble(scene_factory:Callable, grid:dict[str, list], steps:int, delta_time:float = DELTA_TIME, processes:int = None) -> Iterator[dict]:
+    """Runs every variant of a scene in a process pool and hands back results as soon as each one finishes.
+    Workers stay alive between variants, so start up only gets paid once per process.
+
+    Args:
+        scene_factory (Callable): Builds the scene like the ones in SCENES do, has to be a module level function so it can be sent to the workers.
+        grid (dict[str, list]): Parameter name to the values to try, see SCENE_PARAMETERS for where they go.
+        steps (int): Amount of update() calls per variant.
+        delta_time (float, optional): Time passed to every update() call. Defaults to DELTA_TIME.
+        processes (int, optional): Amount of worker processes. Defaults to None (every core).
+
+    Yields:
+        Iterator[dict]: Summary metrics of every variant in the order they finish, "index" says which variant it was.
+    """
+    tasks = [(index, scene_factory, parameters, steps, delta_time) for index, parameters in enumerate(make_variants(grid))]
+    with multiprocessing.Pool(processes) as pool:
+        for result in pool.imap_unordered(run_variant, tasks): #one variant per task, they take long enough that batching them up only hurts load balancing
+            yield result
+
+
+def parse_value(text:str) -> "int | float | str":
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Runs every combination of a parameter grid on a scene across a process pool and streams a JSON line per variant.")
+    parser.add_argument("scene", choices=sorted(SCENES), help="scene to load")
+    parser.add_argument("--grid", nargs="+", default=[], metavar="NAME=VALUES", help="comma separated values to try, like gravity=500,1000 subsets=4,8 motor=0.005,0.01 seed=0,1,2")
+    parser.add_argument("--steps", type=int, default=500, help="amount of Solver.update() calls per variant")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, defaults to every core")
+    parser.add_argument("--output", default=None, help="file to write the JSON lines into as well as printing them")
+    arguments = parser.parse_args()
+
+    grid = {}
+    for entry in arguments.grid:
+        name, _, values = entry.partition("=")
+        if not values:
+            raise ValueError(f"Grid entry [{entry}] needs to look like name=value,value")
+        grid[name] = [parse_value(value) for value in values.split(",")]
+
+    file = open(arguments.output, "w") if arguments.output else None
+    start = perf_counter()
+    finished = 0
+    for result in run_ensemble(SCENES[arguments.scene], grid, arguments.steps, processes=arguments.processes):
+        finished += 1
+        line = json.dumps(result)
+        print(line, flush=True)
+        if file is not None:
+            file.write(line + "\n")
+            file.flush()
+
+    if file is not None:
+        file.close()
+    print(f"{finished} variants in {perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
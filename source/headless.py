@@ -0,0 +1,51 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1") #keep the output clean for scripts
+from solver import Solver
+from scenes import SCENES
+from time import perf_counter
+import argparse
+
+
+def run(solver:Solver, steps:int, delta_time:float) -> float:
+    """Steps a Solver as fast as it can go.
+
+    Args:
+        solver (Solver): Solver to step.
+        steps (int): Amount of update() calls.
+        delta_time (float): Time passed to every update() call.
+
+    Returns:
+        float: Steps per second.
+    """
+    start = perf_counter()
+    for step in range(steps):
+        solver.update(delta_time)
+
+    return steps / max(perf_counter() - start, 1e-9)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Runs a scene without any display and reports how fast the Solver steps.")
+    parser.add_argument("scene", choices=sorted(SCENES), help="scene to load")
+    parser.add_argument("--steps", type=int, default=1000, help="amount of Solver.update() calls")
+    parser.add_argument("--amount", type=int, default=100, help="amount of balls the scene spawns")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--framerate", type=int, default=100, help="steps are 1/framerate seconds long, like main.py")
+    parser.add_argument("--subsets", type=int, default=8)
+    parser.add_argument("--gravity", type=float, default=1000)
+    parser.add_argument("--broadphase", default="brute_force", choices=["brute_force", "spatial_hash", "sweep_and_prune", "dynamic_tree"])
+    parser.add_argument("--backend", default="objects", choices=["objects", "arrays"])
+    parser.add_argument("--workers", type=int, default=0, help="processes that solve islands of touching balls at the same time, needs the arrays backend")
+    arguments = parser.parse_args()
+
+    grav_objects, no_grav_objects = SCENES[arguments.scene](arguments.width, arguments.height, arguments.amount)
+    solver = Solver(grav_objects, no_grav_objects, subsets=arguments.subsets, gravity=arguments.gravity, broadphase=arguments.broadphase, backend=arguments.backend, workers=arguments.workers)
+
+    steps_per_second = run(solver, arguments.steps, 1/arguments.framerate)
+    solver.close()
+    print(f"{arguments.scene}: {arguments.steps} steps, {len(solver.all_objects)} objects, {steps_per_second:.2f} steps/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,12 @@ from pygame import gfxdraw  # noqa: F401
 import pygame_plus # noqa: F401
 import solver # noqa: F401
 from solver import Solver, Line, Ball, Polygon # noqa: F401
+from profiler import Profiler
+from stepper import FixedStepper
+from render import Renderer
+from sprites import SpriteCache
+from pipeline import RenderPipeline, draw_overlay
+import snapshot
 import math # noqa: F401
 import multiprocessing # noqa: F401
 from random import randint # noqa: F401
@@ -12,7 +18,12 @@ import sys
 #USER VARIABLES
 WINDOW_WIDTH = int(sys.argv[1])
 WINDOW_HEIGHT = int(sys.argv[2])
-FRAMERATE = 100
+FRAMERATE = 100 #how often the screen gets drawn
+PHYSICS_RATE = 100 #how often the Solver steps, doesn't have to match FRAMERATE
+MAX_STEPS_PER_FRAME = 5 #past this the simulation slows down instead of trying to catch up
+SNAPSHOT_FILE = "world.snapshot" #F5 saves the world here, F9 loads it back
+SPRITE_CACHE_BYTES = 64 * 1024 * 1024 #memory the pre-rendered ball and polygon sprites can take up, 0 to draw everything directly
+PIPELINED_RENDERING = False #draws on its own thread while the next steps run, some platforms (macOS) only let the main thread draw to the window
 
 #Initialize PyGame
 pygame.init()
@@ -23,7 +34,7 @@ engine_clock = pygame.time.Clock()
 
 
 #GENERAL VARIABLES
-delta_time = 1/FRAMERATE #lock it to 1s divided between frames to help stability
+frame_time = 0 #real time the last frame took
 
 #objects
 grav_objects = [Ball(display, Vector2(WINDOW_WIDTH/2, WINDOW_HEIGHT/2), 30, (255, 0, 0))]
@@ -75,40 +86,38 @@ temp_end = pygame.Vector2(0, 0)
 drawing = False
 perf_font = pygame.font.SysFont("Arial", 16)
 
-phys_solver = Solver(grav_objects, no_grav_objects, gravity=1000)
+phys_solver = Solver(grav_objects, no_grav_objects, gravity=1000, profiler=Profiler())
+stepper = FixedStepper(phys_solver, 1/PHYSICS_RATE, MAX_STEPS_PER_FRAME) #fixed steps to help stability, whatever the framerate does
+renderer = Renderer(display, sprites=SpriteCache(SPRITE_CACHE_BYTES) if SPRITE_CACHE_BYTES > 0 else None) #only redraws what changed, so no filling the display every frame
+pipeline = None
+if PIPELINED_RENDERING:
+    pipeline = RenderPipeline(renderer, 1/PHYSICS_RATE, FRAMERATE, perf_font)
+    pipeline.extra_objects = rendered_objects
+    pipeline.attach(phys_solver)
+    pipeline.start()
 
 follow_mouse = False
 
 #Functions
-def average_calculator(averages:list) -> float:
-    average = 0
-    for i in averages:
-        average += i
+def perf_overlays(profiler:Profiler) -> list[tuple]:
+    collision_average = round(profiler.average("Collisions")*phys_solver.subsets, 2) #per frame instead of per subset
+    position_average = round(profiler.average("Position_Updates")*phys_solver.subsets, 2)
+    gjk_epa_average = round(profiler.average("GJK/EPA"), 2)
+    line_ball_average = round(profiler.average("Line/Ball"), 2)
+    ball_ball_average = round(profiler.average("Ball/Ball"), 2)
     
-    average /= len(averages)
-    return average
-
-
-def perf_render(surface: pygame.Surface, font:pygame.Font, performance_dict:list) -> None:
-    collision_average = round(average_calculator(performance_dict["Collisions"])*8, 2)
-    position_average = round(average_calculator(performance_dict["Position_Updates"])*8, 2)
-    gjk_epa_average = round(average_calculator(performance_dict["GJK/EPA"]), 2)
-    line_ball_average = round(average_calculator(performance_dict["Line/Ball"]), 2)
-    ball_ball_average = round(average_calculator(performance_dict["Ball/Ball"]), 2)
-    
-    surface.blit(font.render(str("Collisions: ~" + str(collision_average)+"ms"), True, (0, 255, 0)), (0, 30))
-    surface.blit(font.render(str("Position Updates: ~" + str(position_average)+"ms"), True, (0, 255, 0)), (0, 60))
-    surface.blit(font.render(str("GJK/EPA: ~" + str(gjk_epa_average)+"ms"), True, (0, 255, 0)), (0, 90))
-    surface.blit(font.render(str("Line/Ball: ~" + str(line_ball_average)+"ms"), True, (0, 255, 0)), (0, 120))
-    surface.blit(font.render(str("Ball/Ball: ~" + str(ball_ball_average)+"ms"), True, (0, 255, 0)), (0, 150))
+    return [("text", "Collisions: ~" + str(collision_average)+"ms", (0, 30), (0, 255, 0)),
+            ("text", "Position Updates: ~" + str(position_average)+"ms", (0, 60), (0, 255, 0)),
+            ("text", "GJK/EPA: ~" + str(gjk_epa_average)+"ms", (0, 90), (0, 255, 0)),
+            ("text", "Line/Ball: ~" + str(line_ball_average)+"ms", (0, 120), (0, 255, 0)),
+            ("text", "Ball/Ball: ~" + str(ball_ball_average)+"ms", (0, 150), (0, 255, 0))]
 
 
 #MAIN LOOP
 engine_running = True
 while engine_running:
-    display.fill((0,0,0))
-    engine_clock.tick(FRAMERATE)
-    pygame.display.set_caption(f"Pythonic Physics Engine  |  Frames Per Second: {int(engine_clock.get_fps())}, Target FPS: {FRAMERATE}")
+    frame_time = engine_clock.tick(FRAMERATE) / 1000
+    pygame.display.set_caption(f"Pythonic Physics Engine  |  Frames Per Second: {int(engine_clock.get_fps())}, Target FPS: {FRAMERATE}, Physics Rate: {PHYSICS_RATE}")
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
@@ -171,6 +180,25 @@ while engine_running:
                         temp_list.append(f"Line(display, Vector2({line.position[0]}, {line.position[1]}), [Vector2({line.points[0][0]}, {line.points[0][1]}), Vector2({line.points[1][0]}, {line.points[1][1]})], anchored={line.anchored})")
                 print(temp_list)
                     
+            elif event.key == pygame.K_F5: #quicksave
+                snapshot.save(phys_solver, SNAPSHOT_FILE)
+                print(f"Saved {len(phys_solver.all_objects)} objects to {SNAPSHOT_FILE}")
+
+            elif event.key == pygame.K_F9: #quickload, the loaded world replaces everything
+                try:
+                    phys_solver = snapshot.load(SNAPSHOT_FILE, display, profiler=phys_solver.profiler)
+                except (OSError, ValueError) as error: #no quicksave yet or a broken file, the current world carries on
+                    print(f"Couldn't load {SNAPSHOT_FILE}: {error}")
+                    continue
+                stepper = FixedStepper(phys_solver, 1/PHYSICS_RATE, MAX_STEPS_PER_FRAME)
+                renderer.invalidate()
+                if pipeline is not None:
+                    pipeline.attach(phys_solver)
+                grav_objects = phys_solver.grav_objects
+                not_mouse_objects = phys_solver.no_grav_objects
+                mouse_objects = []
+                invisible_physics_objects = []
+
             elif event.key == pygame.K_1:
                 mouse_pos = pygame.mouse.get_pos()
                 grav_objects.append(Ball(display, Vector2(mouse_pos[0], mouse_pos[1]), 60))
@@ -181,18 +209,12 @@ while engine_running:
         
     no_grav_objects = not_mouse_objects + mouse_objects + invisible_physics_objects
     phys_solver.no_grav_objects = no_grav_objects
-    phys_solver.update(delta_time)
+    stepper.advance(frame_time)
 
     
-    #I should split these onto three other threads for better perf?
-    for object in grav_objects:
-        object.draw_antialiased_wireframe()
-    
-    for object in no_grav_objects:
-        object.draw_antialiased_wireframe()
-
-    for object in rendered_objects:
-        object.draw_antialiased_wireframe()
+    #with PIPELINED_RENDERING the render thread draws the frames stepper.advance() published while the next frame's steps run
+    if pipeline is None:
+        renderer.draw(grav_objects + no_grav_objects + rendered_objects, stepper.render_offset) #drawn between the last two steps so motion stays smooth when the rates don't match, rendered_objects get no offset
         
     # othergon.draw_antialiased_wireframe()
     
@@ -202,10 +224,11 @@ while engine_running:
         not_mouse_objects[0].position = mouse_pos
         not_mouse_objects[0].last_position = mouse_pos
     
+    overlays = perf_overlays(phys_solver.profiler)
     if drawing:
         mouse_pos = pygame.mouse.get_pos()
         mouse_vector = Vector2(mouse_pos[0], mouse_pos[1])
-        gfxdraw.line(display, int(temp_start[0]), int(temp_start[1]), int(mouse_pos[0]), int(mouse_pos[1]), (165, 165, 165))
+        overlays.append(("line", (int(temp_start[0]), int(temp_start[1])), mouse_pos, (165, 165, 165)))
         # print(temp_start.angle_to(mouse_vector))
         # normals = [Vector2((-1*(mouse_vector[1] - temp_start[1]), (mouse_vector[0] - temp_start[0]))), Vector2(((mouse_vector[1] - temp_start[1]), -1*(mouse_vector[0] - temp_start[0])))]
         # gfxdraw.aacircle(display, int(normals[0][0]), int(normals[0][1]), 10, (255, 165, 0))
@@ -214,11 +237,14 @@ while engine_running:
 
     # print(f"POLYGON 1 |  X: {no_grav_objects[0].position[0]}, Y: {no_grav_objects[0].position[0]}.   |  POINTS:  {no_grav_objects[0].points}")
     # print(f"POLYGON 2 |  X: {grav_objects[0].position[0]}, Y: {grav_objects[0].position[0]}.   |  POINTS:  {grav_objects[0].points}")
-    try:
-        perf_render(display, perf_font, phys_solver.performance_analytics)
-    except ZeroDivisionError:
-        pass
-    pygame.display.flip()
+    if pipeline is None:
+        for overlay in overlays:
+            renderer.overlay(draw_overlay(display, perf_font, overlay))
+        renderer.present()
+    else:
+        pipeline.overlays = tuple(overlays) #swapped whole, the render thread picks it up next frame
 #EXIT PROGRAM
+if pipeline is not None:
+    pipeline.stop()
 pygame.quit()
 raise SystemExit #the same as sys.exit(), to avoid importing sys
\ No newline at end of file
@@ -0,0 +1,312 @@
+import pygame
+from pygame import Vector2
+from pygame import gfxdraw
+from solver import Solver, PhysicsObject, Ball, Polygon, BallArrays
+import threading
+import time
+import math
+
+
+class BallState():
+    """Frozen copy of what drawing a Ball needs, made on the physics thread and only ever read by the render thread."""
+    __slots__ = ("key", "surface", "position", "color", "radius")
+
+    def __init__(self, key:int, surface:pygame.Surface, position:tuple[float, float], color:tuple, radius:float) -> None:
+        self.key = key
+        self.surface = surface
+        self.position = position
+        self.color = color
+        self.radius = radius
+
+
+    def draw_antialiased_wireframe(self, offset:Vector2 = None) -> bool:
+        """Draws the antialiased wireframe of the Ball.
+
+        Args:
+            offset (Vector2, optional): Draws the Ball moved by this much, for render interpolation. Defaults to None (where it is).
+
+        Returns:
+            bool: Returns if the Ball was too far out to draw.
+        """
+        x, y = self.position
+        if offset is not None:
+            x += offset[0]
+            y += offset[1]
+        try:
+            gfxdraw.aacircle(self.surface, int(x), int(y), int(self.radius), self.color)
+        except OverflowError:
+            return True
+        return False
+
+
+class PolygonState():
+    """Frozen copy of what drawing a Polygon needs, the points only get worked out once the render thread asks for them."""
+    __slots__ = ("key", "surface", "position", "rotation", "color", "point_relatives", "_points")
+
+    def __init__(self, key:int, surface:pygame.Surface, position:tuple[float, float], rotation:float, color:tuple, point_relatives:tuple) -> None:
+        self.key = key
+        self.surface = surface
+        self.position = position
+        self.rotation = rotation
+        self.color = color
+        self.point_relatives = point_relatives #shared between captures while the shape doesn't change
+        self._points = None
+
+
+    @property
+    def points(self) -> tuple:
+        if self._points is None: #same maths as Polygon.points so the result matches to the bit
+            x, y = self.position
+            radians = math.radians(self.rotation)
+            cos = math.cos(radians)
+            sin = math.sin(radians)
+            self._points = tuple((cos*relative_x - sin*relative_y + x, sin*relative_x + cos*relative_y + y) for relative_x, relative_y in self.point_relatives)
+        return self._points
+
+
+    def draw_antialiased_wireframe(self, offset:Vector2 = None) -> bool:
+        """Draws the antialiased wireframe of the Polygon.
+
+        Args:
+            offset (Vector2, optional): Draws the Polygon moved by this much, for render interpolation. Defaults to None (where it is).
+
+        Returns:
+            bool: Returns if the Polygon was too far out to draw.
+        """
+        points = self.points if offset is None else [(point[0] + offset[0], point[1] + offset[1]) for point in self.points]
+        try:
+            gfxdraw.aapolygon(self.surface, points, self.color)
+        except OverflowError:
+            return True
+        return False
+
+
+class LineState():
+    """Frozen copy of what drawing a Line needs."""
+    __slots__ = ("key", "surface", "position", "color", "points")
+
+    def __init__(self, key:int, surface:pygame.Surface, position:tuple[float, float], color:tuple, points:tuple) -> None:
+        self.key = key
+        self.surface = surface
+        self.position = position
+        self.color = color
+        self.points = points
+
+
+    def draw_antialiased_wireframe(self, offset:Vector2 = None) -> bool:
+        """Draws the Line.
+
+        Args:
+            offset (Vector2, optional): Draws the Line moved by this much, for render interpolation. Defaults to None (where it is).
+
+        Returns:
+            bool: Returns if the Line was too far out to draw.
+        """
+        (x1, y1), (x2, y2) = self.points[0], self.points[1]
+        if offset is not None:
+            x1 += offset[0]
+            x2 += offset[0]
+            y1 += offset[1]
+            y2 += offset[1]
+        try:
+            gfxdraw.line(self.surface, int(x1), int(y1), int(x2), int(y2), self.color)
+        except OverflowError:
+            return True
+        return False
+
+
+class RenderFrame():
+    """Everything drawn for one Solver step, never changed after it's published."""
+    __slots__ = ("bodies", "step", "time")
+
+    def __init__(self, bodies:tuple, step:int, time:float) -> None:
+        self.bodies = bodies
+        self.step = step
+        self.time = time #perf_counter() when it was published
+
+
+def draw_overlay(surface:pygame.Surface, font:pygame.font.Font, overlay:tuple) -> pygame.Rect:
+    """Draws one overlay, like the perf text or the line being drawn with the mouse.
+
+    Args:
+        surface (pygame.Surface): Surface to draw onto.
+        font (pygame.font.Font): Font for text overlays.
+        overlay (tuple): ("text", text, (x, y), color) or ("line", (x1, y1), (x2, y2), color).
+
+    Returns:
+        pygame.Rect: Area drawn over, for Renderer.overlay().
+    """
+    kind = overlay[0]
+    if kind == "text":
+        kind, text, position, color = overlay
+        return surface.blit(font.render(text, True, color), position)
+    elif kind == "line":
+        kind, start, end, color = overlay
+        gfxdraw.line(surface, int(start[0]), int(start[1]), int(end[0]), int(end[1]), color)
+        return pygame.Rect(int(start[0]), int(start[1]), 1, 1).union(pygame.Rect(int(end[0]), int(end[1]), 1, 1))
+    else:
+        raise ValueError(f"Unknown overlay kind: {kind}")
+
+
+class RenderPipeline():
+    """Draws on its own thread while the physics keeps stepping, so a frame costs the slower of the two instead of both added up.
+    After every Solver.update() the physics thread copies what drawing needs into a RenderFrame of plain tuples and floats and publishes it by swapping one reference.
+    The render thread draws between the last two published frames while the next one gets worked out, the two never share a mutable Vector2 so there are no locks.
+    Some platforms (macOS) only let the main thread touch the window, keep PIPELINED_RENDERING off there."""
+
+    def __init__(self, renderer, step_time:float = 1/100, framerate:int = 100, font:pygame.font.Font = None) -> None:
+        """Pipelined renderer.
+
+        Args:
+            renderer (Renderer): Renderer the render thread draws with, nothing else should draw with it once start() is called.
+            step_time (float, optional): Length of a Solver step, for interpolating between frames. Defaults to 1/100.
+            framerate (int, optional): How often the render thread draws. Defaults to 100.
+            font (pygame.font.Font, optional): Font for text overlays. Defaults to None (the default font at size 16).
+        """
+        self.renderer = renderer
+        renderer.key = lambda state: state.key #states are new every step, the object they came from stays the same
+        self.step_time = step_time
+        self.framerate = framerate
+        self.font = font if font is not None else pygame.font.Font(None, 16)
+
+        self.frames = (None, None) #(previous, latest), swapped whole by the physics thread
+        self.overlays = () #swapped whole by the main loop
+        self.extra_objects = [] #drawn but not in the Solver, like main.py's rendered_objects
+        self.shapes = {} #id of a polygon to (its point_relatives, their frozen copy), only touched by the physics thread
+        self.solver = None
+        self.steps = 0
+        self.frames_drawn = 0
+
+        self.running = False
+        self.thread = None
+
+
+    def attach(self, solver:Solver) -> None:
+        """Publishes a frame after every update() of a Solver, replacing the Solver it was attached to.
+
+        Args:
+            solver (Solver): Solver to capture.
+        """
+        self.detach()
+        self.solver = solver
+        solver.update_hooks.append(self.publish)
+        self.renderer.invalidate()
+        self.publish(solver)
+
+
+    def detach(self) -> None:
+        """Stops capturing the attached Solver."""
+        if self.solver is not None and self.publish in self.solver.update_hooks:
+            self.solver.update_hooks.remove(self.publish)
+        self.solver = None
+
+
+    def capture(self, objects:list[PhysicsObject], arrays:BallArrays = None) -> tuple:
+        """Copies what drawing needs out of the objects, runs on the physics thread.
+
+        Args:
+            objects (list[PhysicsObject]): Objects to copy.
+            arrays (BallArrays, optional): The Solver's BallArrays, Balls in it get copied out in bulk. Defaults to None.
+
+        Returns:
+            tuple: BallStates, PolygonStates and LineStates, in draw order.
+        """
+        bodies = []
+        shapes = self.shapes
+        positions = radii = None
+        if arrays is not None: #one bulk copy instead of a NumPy read per Ball
+            positions = arrays.positions[:arrays.count].tolist()
+            radii = arrays.radii[:arrays.count].tolist()
+
+        for object in objects:
+            surface = object.surface
+            if surface is None: #headless
+                continue
+
+            radius = None
+            if positions is not None and object.arrays is arrays:
+                x, y = positions[object.row]
+                radius = radii[object.row]
+            else:
+                x, y = object.position
+
+            if not (math.isfinite(x) and math.isfinite(y)): #nothing to draw, capturing only ever reads the objects
+                continue
+
+            color = object.color
+            if type(color) is not tuple:
+                color = tuple(color)
+
+            if isinstance(object, Ball):
+                bodies.append(BallState(id(object), surface, (x, y), color, object.radius if radius is None else radius))
+            elif isinstance(object, Polygon):
+                point_relatives = object.point_relatives
+                shape = shapes.get(id(object))
+                if shape is None or shape[0] is not point_relatives:
+                    if len(shapes) > 4096: #objects come and go, don't hold onto the dead ones forever
+                        shapes.clear()
+                    shape = shapes[id(object)] = (point_relatives, tuple((point[0], point[1]) for point in point_relatives))
+                bodies.append(PolygonState(id(object), surface, (x, y), object.rotation, color, shape[1]))
+            else:
+                bodies.append(LineState(id(object), surface, (x, y), color, tuple((point[0], point[1]) for point in object.points)))
+        return tuple(bodies)
+
+
+    def publish(self, solver:Solver) -> None:
+        """Captures the Solver and swaps the result in as the latest frame, it's in Solver.update_hooks.
+
+        Args:
+            solver (Solver): Solver that just stepped.
+        """
+        self.steps += 1
+        frame = RenderFrame(self.capture(solver.grav_objects + solver.no_grav_objects + self.extra_objects, solver.ball_arrays), self.steps, time.perf_counter())
+        self.frames = (self.frames[1], frame) #one reference swap, the render thread sees the old pair or the new one and never half of each
+
+
+    def start(self) -> None:
+        """Starts the render thread."""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="render", daemon=True)
+        self.thread.start()
+
+
+    def stop(self) -> None:
+        """Stops the render thread and waits for its last frame to finish."""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+        self.thread = None
+
+
+    def run(self) -> None:
+        """Render thread loop, draws the latest frame at the framerate."""
+        clock = pygame.time.Clock()
+        previous_frame = None
+        previous_positions = {}
+        while self.running:
+            clock.tick(self.framerate)
+            previous, latest = self.frames
+            if latest is None:
+                continue
+
+            if previous is not previous_frame: #only rebuilt once per step
+                previous_frame = previous
+                previous_positions = {} if previous is None else {state.key: state.position for state in previous.bodies}
+
+            #drawn between the last two steps like FixedStepper.render_offset, with the time since the latest step standing in for the accumulator
+            remaining = 1 - min(1, (time.perf_counter() - latest.time) / self.step_time)
+            def offset(state:BallState) -> Vector2:
+                previous_position = previous_positions.get(state.key)
+                if previous_position is None or remaining == 0:
+                    return None
+                x, y = state.position
+                return Vector2((previous_position[0] - x) * remaining, (previous_position[1] - y) * remaining)
+
+            renderer = self.renderer
+            renderer.draw(latest.bodies, offset)
+            for overlay in self.overlays:
+                renderer.overlay(draw_overlay(renderer.surface, self.font, overlay))
+            renderer.present()
+            self.frames_drawn += 1
@@ -0,0 +1,152 @@
+from array import array
+import json
+import math
+
+
+HISTOGRAM_BUCKETS = 128 #quarter octave buckets starting at 1 microsecond, they reach 2^32 microseconds (about 71 minutes) and the last one catches anything longer
+
+
+class RingBuffer():
+    """Fixed size buffer of the most recent timings of a phase, nothing gets allocated after it's made."""
+
+    def __init__(self, size:int, histogram:bool = False) -> None:
+        """Ring buffer of timings.
+
+        Args:
+            size (int): Amount of recent timings to keep.
+            histogram (bool, optional): Also count every timing ever recorded into log spaced buckets for percentiles. Defaults to False.
+        """
+        self.values = array("d", bytes(8 * size))
+        self.size = size
+        self.index = 0
+        self.count = 0
+        self.total_count = 0
+        self.histogram = array("q", bytes(8 * HISTOGRAM_BUCKETS)) if histogram else None
+
+
+    def record(self, milliseconds:float) -> None:
+        self.values[self.index] = milliseconds
+        self.index += 1
+        if self.index == self.size:
+            self.index = 0
+        if self.count < self.size:
+            self.count += 1
+        self.total_count += 1
+
+        if self.histogram is not None:
+            bucket = int(math.log2(milliseconds * 1000) * 4) if milliseconds > 0.001 else 0
+            self.histogram[min(bucket, HISTOGRAM_BUCKETS - 1)] += 1
+
+
+    def recent(self) -> list[float]:
+        """Gets the kept timings, newest first.
+
+        Returns:
+            list[float]: Timings in milliseconds.
+        """
+        return [self.values[(self.index - offset) % self.size] for offset in range(1, self.count + 1)]
+
+
+    def percentile(self, fraction:float) -> float:
+        """Estimates a percentile from the histogram, accurate to about 19%.
+
+        Args:
+            fraction (float): Which percentile, 0.5 is the median.
+
+        Returns:
+            float: Upper edge of the bucket the percentile falls in, in milliseconds.
+        """
+        target = fraction * self.total_count
+        seen = 0
+        for bucket, bucket_count in enumerate(self.histogram):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                return 2 ** ((bucket + 1) / 4) / 1000
+        return 0.0
+
+
+
+class Profiler():
+    """Low overhead timing storage for the Solver, one RingBuffer per phase and pair type.
+    Pass one into Solver(profiler=...) to turn profiling on, leaving it out skips all the timing code."""
+
+    def __init__(self, size:int = 16, histograms:bool = False) -> None:
+        """Profiler.
+
+        Args:
+            size (int, optional): Amount of recent timings kept per phase. Defaults to 16.
+            histograms (bool, optional): Keep histograms for p50/p95/p99 too. Defaults to False.
+        """
+        self.size = size
+        self.histograms = histograms
+        self.buffers = {}
+
+
+    def record(self, phase:str, milliseconds:float) -> None:
+        """Records a timing.
+
+        Args:
+            phase (str): Name of the phase or pair type.
+            milliseconds (float): How long it took.
+        """
+        buffer = self.buffers.get(phase)
+        if buffer is None:
+            buffer = self.buffers[phase] = RingBuffer(self.size, self.histograms)
+        buffer.record(milliseconds)
+
+
+    def average(self, phase:str) -> float:
+        """Finds the average of the kept timings of a phase.
+
+        Args:
+            phase (str): Name of the phase.
+
+        Returns:
+            float: Average in milliseconds, 0 if nothing was recorded.
+        """
+        buffer = self.buffers.get(phase)
+        if buffer is None or buffer.count == 0:
+            return 0.0
+        return sum(buffer.values[:buffer.count]) / buffer.count
+
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Gets the statistics of every phase.
+
+        Returns:
+            dict[str, dict[str, float]]: Phase name to its statistics, all in milliseconds. Percentiles are only there with histograms on.
+        """
+        statistics = {}
+        for phase, buffer in self.buffers.items():
+            recent = buffer.values[:buffer.count]
+            phase_statistics = {
+                "count": buffer.total_count,
+                "last": buffer.values[(buffer.index - 1) % buffer.size],
+                "mean": sum(recent) / buffer.count,
+                "min": min(recent),
+                "max": max(recent)
+            }
+
+            if buffer.histogram is not None:
+                phase_statistics["p50"] = buffer.percentile(0.5)
+                phase_statistics["p95"] = buffer.percentile(0.95)
+                phase_statistics["p99"] = buffer.percentile(0.99)
+
+            statistics[phase] = phase_statistics
+
+        return statistics
+
+
+    def export(self, path:str) -> None:
+        """Writes a snapshot to a JSON file.
+
+        Args:
+            path (str): File to write.
+        """
+        with open(path, "w") as file:
+            json.dump(self.snapshot(), file, indent=4)
+
+
+    def reset(self) -> None:
+        """Forgets every timing."""
+        self.buffers = {}
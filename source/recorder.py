@@ -0,0 +1,325 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1") #keep the output clean for scripts
+import pygame
+from pygame import Vector2
+from solver import Solver, PhysicsObject, Line, Polygon
+from scenes import SCENES
+import snapshot
+import argparse
+import json
+try:
+    import numpy as np
+except ImportError: #the recorder needs numpy, the rest of the engine doesn't
+    np = None
+
+
+#USER VARIABLES
+WORLD_WIDTH = 1920
+WORLD_HEIGHT = 1080
+DELTA_TIME = 1/100 #same as main.py
+CHUNK_STEPS = 256 #steps per chunk file, only one chunk is ever mapped while recording
+
+#A recording is a folder:
+#  meta.json          version, amount of bodies and steps, steps per chunk and dtype
+#  start.snapshot     snapshot.dump() of the Solver when recording started, gives the shapes back for replays
+#  frames_00000.npy   (steps per chunk, bodies, 3) x, y and rotation of every body at the end of every step
+#  times_00000.npy    (steps per chunk,) Solver.time_elapsed at the end of every step
+VERSION = 1
+
+
+def chunk_path(path:str, name:str, chunk:int) -> str:
+    return os.path.join(path, f"{name}_{chunk:05d}.npy")
+
+
+class TrajectoryRecorder():
+    """Streams the position and rotation of every body after every Solver.update() into memory mapped chunk files.
+    RAM use stays at one chunk no matter how long the run is, the operating system writes pages out as they fill up."""
+
+    def __init__(self, solver:Solver, path:str, chunk_steps:int = CHUNK_STEPS, dtype:str = "float32") -> None:
+        """Trajectory recorder, hooks itself into the Solver straight away.
+        Records the objects the Solver has right now, in Solver order (grav_objects then no_grav_objects), objects added later aren't recorded.
+
+        Args:
+            solver (Solver): Solver to record.
+            path (str): Folder to write the recording into, made if it's missing.
+            chunk_steps (int, optional): Steps per chunk file. Defaults to CHUNK_STEPS.
+            dtype (str, optional): Number type of the frames, "float32" is good to about a hundredth of a pixel at half the size of "float64". Defaults to "float32".
+        """
+        if np is None:
+            raise ImportError("TrajectoryRecorder needs numpy installed")
+
+        self.solver = solver
+        self.path = path
+        self.chunk_steps = chunk_steps
+        self.dtype = np.dtype(dtype)
+        self.objects = solver.grav_objects + solver.no_grav_objects
+
+        self.rotating = [(index, object) for index, object in enumerate(self.objects) if isinstance(object, Polygon)]
+        self.batched = solver.ball_arrays is not None #Balls in the arrays backend get copied straight from their rows
+        if self.batched:
+            self.ball_indices = np.array([index for index, object in enumerate(self.objects) if object.arrays is not None], dtype=np.intp)
+            self.loose = [(index, object) for index, object in enumerate(self.objects) if object.arrays is None]
+            self.detached = None
+        else:
+            self.loose = list(enumerate(self.objects))
+
+        os.makedirs(path, exist_ok=True)
+        snapshot.save(solver, os.path.join(path, "start.snapshot"))
+
+        self.steps = 0
+        self.chunk = -1
+        self.frames = None
+        self.times = None
+        self.write_meta()
+        solver.update_hooks.append(self.record)
+
+
+    def write_meta(self) -> None:
+        with open(os.path.join(self.path, "meta.json"), "w") as file:
+            json.dump({"version": VERSION, "bodies": len(self.objects), "steps": self.steps, "chunk_steps": self.chunk_steps, "dtype": self.dtype.str}, file)
+
+
+    def next_chunk(self) -> None:
+        """Lets go of the full chunk and maps a new one."""
+        self.flush()
+        self.chunk += 1
+        self.frames = np.lib.format.open_memmap(chunk_path(self.path, "frames", self.chunk), mode="w+", dtype=self.dtype, shape=(self.chunk_steps, len(self.objects), 3))
+        self.times = np.lib.format.open_memmap(chunk_path(self.path, "times", self.chunk), mode="w+", dtype=np.float64, shape=(self.chunk_steps,))
+
+
+    def flush(self) -> None:
+        """Writes everything recorded so far out to disk, the recording can be read while it's still going."""
+        if self.frames is not None:
+            self.frames.flush()
+            self.times.flush()
+        self.write_meta()
+
+
+    def record(self, solver:Solver) -> None:
+        """Appends the current frame, gets called by the Solver after every update().
+
+        Args:
+            solver (Solver): The recorded Solver.
+        """
+        step = self.steps % self.chunk_steps
+        if step == 0:
+            self.next_chunk()
+        frame = self.frames[step]
+
+        if self.batched:
+            arrays = solver.ball_arrays
+            if self.detached != arrays.detached: #rows moved around
+                self.ball_rows = np.array([self.objects[index].row for index in self.ball_indices.tolist()], dtype=np.intp)
+                self.detached = arrays.detached
+            frame[self.ball_indices, :2] = arrays.positions[self.ball_rows]
+
+        for index, object in self.loose:
+            position = object.position
+            frame[index, 0] = position[0]
+            frame[index, 1] = position[1]
+        for index, object in self.rotating:
+            frame[index, 2] = object.rotation
+
+        self.times[step] = solver.time_elapsed
+        self.steps += 1
+
+
+    def close(self) -> None:
+        """Stops recording and writes out the rest."""
+        if self.record in self.solver.update_hooks:
+            self.solver.update_hooks.remove(self.record)
+        self.flush()
+        self.frames = None #unmaps the last chunk
+        self.times = None
+
+
+
+class TrajectoryReader():
+    """Reads recordings made by TrajectoryRecorder, chunks get mapped as they're needed so only the slices asked for get read off disk."""
+
+    def __init__(self, path:str) -> None:
+        """Trajectory reader.
+
+        Args:
+            path (str): Folder of the recording.
+        """
+        if np is None:
+            raise ImportError("TrajectoryReader needs numpy installed")
+
+        with open(os.path.join(path, "meta.json")) as file:
+            meta = json.load(file)
+        if meta["version"] != VERSION:
+            raise ValueError(f"Unsupported recording version [{meta['version']}]")
+
+        self.path = path
+        self.bodies = meta["bodies"]
+        self.steps = meta["steps"]
+        self.chunk_steps = meta["chunk_steps"]
+        self.dtype = np.dtype(meta["dtype"])
+        self.chunks = {} #chunk number to its (frames, times) maps
+
+
+    def __len__(self) -> int:
+        return self.steps
+
+
+    def map_chunk(self, chunk:int) -> tuple["np.ndarray", "np.ndarray"]:
+        maps = self.chunks.get(chunk)
+        if maps is None:
+            maps = self.chunks[chunk] = (np.load(chunk_path(self.path, "frames", chunk), mmap_mode="r"), np.load(chunk_path(self.path, "times", chunk), mmap_mode="r"))
+        return maps
+
+
+    def read(self, start:int = 0, stop:int = None, bodies:"list[int] | slice" = None) -> tuple["np.ndarray", "np.ndarray"]:
+        """Reads a range of steps, optionally for only some of the bodies.
+
+        Args:
+            start (int, optional): First step. Defaults to 0.
+            stop (int, optional): One past the last step. Defaults to None (the end).
+            bodies (list[int] | slice, optional): Which bodies, by index in Solver order. Defaults to None (all of them).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Frames shaped (steps, bodies, 3) with x, y and rotation, and the time of every step.
+        """
+        start, stop, _ = slice(start, stop).indices(self.steps)
+        stop = max(start, stop)
+        if bodies is None:
+            bodies = slice(None)
+
+        frames = []
+        times = []
+        step = start
+        while step < stop:
+            chunk, offset = divmod(step, self.chunk_steps)
+            end = min(stop - step, self.chunk_steps - offset) + offset
+            chunk_frames, chunk_times = self.map_chunk(chunk)
+            frames.append(chunk_frames[offset:end][:, bodies])
+            times.append(chunk_times[offset:end])
+            step += end - offset
+
+        if not frames:
+            return np.zeros((0, self.bodies, 3), dtype=self.dtype)[:, bodies], np.zeros(0)
+        return np.concatenate(frames), np.concatenate(times)
+
+
+    def frame(self, step:int) -> "np.ndarray":
+        """Reads one step.
+
+        Args:
+            step (int): Which step, negative counts from the end.
+
+        Returns:
+            np.ndarray: (bodies, 3) x, y and rotation of every body.
+        """
+        if step < 0:
+            step += self.steps
+        if not (0 <= step < self.steps):
+            raise IndexError(f"Step [{step}] out of range")
+        chunk, offset = divmod(step, self.chunk_steps)
+        return np.array(self.map_chunk(chunk)[0][offset])
+
+
+    def objects(self, surface:pygame.Surface = None) -> list[PhysicsObject]:
+        """Makes the recorded objects as they were when recording started, for apply() to move around.
+
+        Args:
+            surface (pygame.Surface, optional): Surface to draw onto. Defaults to None (headless).
+
+        Returns:
+            list[PhysicsObject]: The objects, in the same order as the bodies in the frames.
+        """
+        with open(os.path.join(self.path, "start.snapshot"), "rb") as file:
+            grav_objects, no_grav_objects = snapshot.build_objects(file.read(), surface)
+        return grav_objects + no_grav_objects
+
+
+    def apply(self, step:int, objects:list[PhysicsObject]) -> None:
+        """Moves objects made by objects() to where they were at a step, nothing gets simulated.
+
+        Args:
+            step (int): Which step.
+            objects (list[PhysicsObject]): Objects made by objects().
+        """
+        for object, (x, y, rotation) in zip(objects, self.frame(step).tolist()):
+            position = Vector2(x, y)
+            object.position = position
+            object.last_position = position
+            if type(object) == Line:
+                object.points = [position + relative for relative in object.point_relatives]
+            elif isinstance(object, Polygon):
+                object.rotation = rotation
+
+
+
+def replay(path:str, width:int = WORLD_WIDTH, height:int = WORLD_HEIGHT, framerate:int = 100, start:int = 0, stop:int = None, every:int = 1) -> None:
+    """Plays a recording back in a window through the objects' own draw_antialiased_wireframe().
+
+    Args:
+        path (str): Folder of the recording.
+        width (int, optional): Window width. Defaults to WORLD_WIDTH.
+        height (int, optional): Window height. Defaults to WORLD_HEIGHT.
+        framerate (int, optional): Recorded steps shown per second. Defaults to 100.
+        start (int, optional): First step. Defaults to 0.
+        stop (int, optional): One past the last step. Defaults to None (the end).
+        every (int, optional): Only show every nth step, to fast forward. Defaults to 1.
+    """
+    reader = TrajectoryReader(path)
+    pygame.init()
+    display = pygame.display.set_mode((width, height))
+    clock = pygame.time.Clock()
+    objects = reader.objects(display)
+
+    for step in range(*slice(start, stop, every).indices(reader.steps)):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+
+        display.fill((0, 0, 0))
+        reader.apply(step, objects)
+        for object in objects:
+            object.draw_antialiased_wireframe()
+        pygame.display.set_caption(f"Replay  |  Step {step}/{reader.steps}")
+        pygame.display.flip()
+        clock.tick(framerate)
+
+    pygame.quit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Records a scene's trajectories to disk without keeping them in memory, and replays recordings.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="run a scene headless and record every step")
+    record_parser.add_argument("scene", choices=sorted(SCENES), help="scene to load")
+    record_parser.add_argument("output", help="folder to write the recording into")
+    record_parser.add_argument("--steps", type=int, default=1000, help="amount of Solver.update() calls")
+    record_parser.add_argument("--amount", type=int, default=100, help="amount of bodies the scene spawns")
+    record_parser.add_argument("--broadphase", default="spatial_hash", choices=["brute_force", "spatial_hash", "sweep_and_prune", "dynamic_tree"])
+    record_parser.add_argument("--backend", default="objects", choices=["objects", "arrays"])
+    record_parser.add_argument("--chunk-steps", type=int, default=CHUNK_STEPS, help="steps per chunk file")
+    record_parser.add_argument("--dtype", default="float32", choices=["float32", "float64"])
+
+    replay_parser = commands.add_parser("replay", help="draw a recording in a window")
+    replay_parser.add_argument("recording", help="folder of the recording")
+    replay_parser.add_argument("--framerate", type=int, default=100, help="recorded steps shown per second")
+    replay_parser.add_argument("--start", type=int, default=0)
+    replay_parser.add_argument("--stop", type=int, default=None)
+    replay_parser.add_argument("--every", type=int, default=1, help="only show every nth step")
+    arguments = parser.parse_args()
+
+    if arguments.command == "record":
+        grav_objects, no_grav_objects = SCENES[arguments.scene](WORLD_WIDTH, WORLD_HEIGHT, arguments.amount)
+        solver = Solver(grav_objects, no_grav_objects, broadphase=arguments.broadphase, backend=arguments.backend)
+        recorder = TrajectoryRecorder(solver, arguments.output, arguments.chunk_steps, arguments.dtype)
+        for step in range(arguments.steps):
+            solver.update(DELTA_TIME)
+        recorder.close()
+        print(f"Recorded {recorder.steps} steps of {len(recorder.objects)} bodies to {arguments.output}")
+
+    elif arguments.command == "replay":
+        replay(arguments.recording, framerate=arguments.framerate, start=arguments.start, stop=arguments.stop, every=arguments.every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import pygame
+from pygame import Vector2
+from solver import PhysicsObject, Ball
+from sprites import SpriteCache
+from pipeline import BallState
+import math
+from typing import Callable
+
+
+class Renderer():
+    """Draws objects onto their surface but only touches the parts of the screen that changed since the last frame.
+    Objects off the surface never get drawn, and objects that didn't move, turn or change color don't get drawn again unless something next to them did.
+    Use instead of filling the surface, drawing everything and flipping it: draw(), then any overlay()s, then present()."""
+
+    def __init__(self, surface:pygame.Surface, background:pygame.Color = (0, 0, 0), margin:int = 2, full_redraw_fraction:float = 0.5, max_rects:int = 256, sprites:SpriteCache = None) -> None:
+        """Dirty rectangle renderer.
+
+        Args:
+            surface (pygame.Surface): The display surface the objects draw onto.
+            background (pygame.Color, optional): Color to clear with. Defaults to (0, 0, 0) (black).
+            margin (int, optional): Pixels added around every object's bounds for the antialiasing. Defaults to 2.
+            full_redraw_fraction (float, optional): Once the changed area adds up to this much of the surface it gets redrawn whole instead. Defaults to 0.5.
+            max_rects (int, optional): Most changed rectangles before the surface gets redrawn whole instead. Defaults to 256.
+            sprites (SpriteCache, optional): Sprite cache to draw Balls and Polygons with, its background should match this one. Defaults to None (everything draws itself).
+        """
+        self.surface = surface
+        self.background = background
+        self.margin = margin
+        self.full_redraw_fraction = full_redraw_fraction
+        self.max_rects = max_rects
+        self.sprites = sprites
+        self.key = id #tells objects apart between frames, RenderPipeline swaps it for the key its frozen states carry
+
+        self.drawn = {} #key of every object drawn last frame to (object, rect, state), with RenderPipeline the "object" is its frozen state so a dead object's id can get reused, that only ever looks like the object moved and redraws both rects
+        self.overlays = [] #overlay rects of this frame, get cleared next frame
+        self.updated = [] #rects present() pushes to the display
+        self.full_redraw = True
+        self.drawn_count = 0 #objects drawn last frame, for profiling
+
+
+    def invalidate(self) -> None:
+        """Redraws the whole surface next frame, for after something else drew over it."""
+        self.full_redraw = True
+
+
+    def object_rect(self, object:PhysicsObject, offset:Vector2 = None) -> pygame.Rect:
+        """Finds the screen area an object covers when drawn.
+
+        Args:
+            object (PhysicsObject): Object to look at.
+            offset (Vector2, optional): Offset it gets drawn with. Defaults to None.
+
+        Returns:
+            pygame.Rect: Area the object covers, margin included.
+        """
+        if isinstance(object, (Ball, BallState)):
+            x, y = object.position
+            radius = object.radius
+            left, top, right, bottom = x - radius, y - radius, x + radius, y + radius
+        else: #lines and polygons, their position isn't always the middle
+            points = object.points
+            xs = [point[0] for point in points]
+            ys = [point[1] for point in points]
+            left, top, right, bottom = min(xs), min(ys), max(xs), max(ys)
+
+        if offset is not None:
+            left += offset[0]
+            right += offset[0]
+            top += offset[1]
+            bottom += offset[1]
+
+        margin = self.margin
+        try:
+            left = math.floor(left) - margin
+            top = math.floor(top) - margin
+            return pygame.Rect(left, top, math.ceil(right) + margin - left, math.ceil(bottom) + margin - top)
+        except (OverflowError, ValueError): #flew off to infinity, draw_antialiased_wireframe() deals with it
+            return self.surface.get_rect()
+
+
+    def draw_objects(self, objects:list[tuple[PhysicsObject, Vector2]]) -> None:
+        """Draws objects with the sprite cache if there is one, or one by one if not.
+
+        Args:
+            objects (list[tuple[PhysicsObject, Vector2]]): Objects and the offsets to draw them with.
+        """
+        if self.sprites is not None:
+            self.sprites.draw(self.surface, objects)
+            return
+        for object, object_offset in objects:
+            object.draw_antialiased_wireframe(object_offset)
+
+
+    def draw(self, objects:list[PhysicsObject], offset:Callable = None) -> None:
+        """Clears and redraws the parts of the surface that changed.
+
+        Args:
+            objects (list[PhysicsObject]): Everything to draw this frame, objects that were drawn last frame but aren't here get erased.
+            offset (Callable, optional): Gives the draw offset of an object, like FixedStepper.render_offset. Defaults to None (no offsets).
+        """
+        surface = self.surface
+        surface_rect = surface.get_rect()
+        dirty = self.overlays #last frame's overlays
+        self.overlays = []
+        visible = []
+        visible_rects = []
+        drawn = {}
+        last_drawn = self.drawn
+        key = self.key
+
+        for object in objects:
+            object_offset = None if offset is None else offset(object)
+            rect = self.object_rect(object, object_offset)
+            position = object.position
+            if object_offset is not None:
+                position = position + object_offset
+            state = (position[0], position[1], getattr(object, "rotation", 0), object.color, rect.width, rect.height)
+
+            object_key = key(object)
+            old = last_drawn.pop(object_key, None)
+            on_screen = rect.colliderect(surface_rect)
+            if on_screen:
+                visible.append((object, object_offset))
+                visible_rects.append(rect)
+                drawn[object_key] = (object, rect, state)
+
+            if old is None:
+                if on_screen:
+                    dirty.append(rect)
+            elif old[2] != state:
+                dirty.append(old[1])
+                if on_screen:
+                    dirty.append(rect)
+
+        dirty += [rect for object, rect, state in last_drawn.values()] #gone or off screen now
+        self.drawn = drawn
+
+        dirty = [rect.clip(surface_rect) for rect in dirty if rect.colliderect(surface_rect)]
+        if not self.full_redraw:
+            area = sum(rect.width * rect.height for rect in dirty)
+            self.full_redraw = (len(dirty) > self.max_rects) or (area > self.full_redraw_fraction * surface_rect.width * surface_rect.height)
+
+        if self.full_redraw:
+            surface.fill(self.background)
+            self.draw_objects(visible)
+            self.drawn_count = len(visible)
+            self.updated = [surface_rect]
+            self.full_redraw = False
+            return
+
+        #every changed rect gets cleared and has everything touching it drawn back in, clipped so the antialiasing isn't doubled up outside it
+        drawn_count = 0
+        for rect in dirty:
+            surface.set_clip(rect)
+            surface.fill(self.background, rect)
+            touching = [visible[index] for index in rect.collidelistall(visible_rects)]
+            self.draw_objects(touching)
+            drawn_count += len(touching)
+        surface.set_clip(None)
+        self.drawn_count = drawn_count
+        self.updated = dirty
+
+
+    def overlay(self, rect:pygame.Rect) -> None:
+        """Marks an area drawn over after draw(), like text, so it gets shown now and cleared next frame.
+
+        Args:
+            rect (pygame.Rect): Area that got drawn over.
+        """
+        rect = pygame.Rect(rect)
+        self.overlays.append(rect)
+        self.updated.append(rect)
+
+
+    def present(self) -> None:
+        """Pushes the changed parts of the surface to the display."""
+        if self.updated:
+            pygame.display.update(self.updated)
+        self.updated = []
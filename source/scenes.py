@@ -0,0 +1,148 @@
+import pygame
+from pygame import Vector2
+from solver import PhysicsObject, Ball, Line, Polygon
+import math
+import random
+
+
+#Every scene takes the world size and an optional surface (None runs headless) and returns (grav_objects, no_grav_objects) for a Solver.
+
+
+def box(width:int, height:int, surface:pygame.Surface = None) -> list[Line]:
+    """Four anchored walls around the edges of the world, same as the box in main.py.
+
+    Args:
+        width (int): Width of the world.
+        height (int): Height of the world.
+        surface (pygame.Surface, optional): Surface to draw onto. Defaults to None (headless).
+
+    Returns:
+        list[Line]: The walls.
+    """
+    return [Line(surface, Vector2(1, height//2), [Vector2(0, 0), Vector2(0, height-2)], anchored=True),
+            Line(surface, Vector2(width//2, height-1), [Vector2(0, height-1), Vector2(width-1, height-1)], anchored=True),
+            Line(surface, Vector2(width-1, height//2), [Vector2(width-1, height-1), Vector2(width-1, 0+1)], anchored=True),
+            Line(surface, Vector2(width//2, 0), [Vector2(0, 0), Vector2(width-1, 0)], anchored=True)]
+
+
+def spawn_balls(width:int, height:int, amount:int, surface:pygame.Surface = None, seed:int = 0) -> list[Ball]:
+    """Spreads balls over a jittered grid covering the world, sized so none of them start out overlapping.
+
+    Args:
+        width (int): Width of the world.
+        height (int): Height of the world.
+        amount (int): Amount of balls.
+        surface (pygame.Surface, optional): Surface to draw onto. Defaults to None (headless).
+        seed (int, optional): Seed for the jitter so runs are repeatable. Defaults to 0.
+
+    Returns:
+        list[Ball]: The balls.
+    """
+    generator = random.Random(seed)
+    spacing = math.sqrt((width - 2) * (height - 2) / max(amount, 1))
+    columns = max(1, int((width - 2) // spacing))
+    while math.ceil(amount / columns) * spacing > height - 2: #shrink until every row fits
+        spacing *= 0.95
+        columns = max(1, int((width - 2) // spacing))
+
+    radius = spacing * 0.35
+    balls = []
+    for index in range(amount):
+        row, column = divmod(index, columns)
+        x = 1 + spacing * (column + 0.5 + generator.uniform(-0.1, 0.1))
+        y = 1 + spacing * (row + 0.5 + generator.uniform(-0.1, 0.1))
+        balls.append(Ball(surface, Vector2(x, y), radius))
+
+    return balls
+
+
+def ball_box(width:int, height:int, amount:int = 100, surface:pygame.Surface = None, seed:int = 0) -> tuple[list[PhysicsObject], list[PhysicsObject]]:
+    """Balls falling into the box.
+
+    Args:
+        width (int): Width of the world.
+        height (int): Height of the world.
+        amount (int, optional): Amount of balls. Defaults to 100.
+        surface (pygame.Surface, optional): Surface to draw onto. Defaults to None (headless).
+        seed (int, optional): Seed for the spawn jitter. Defaults to 0.
+
+    Returns:
+        tuple[list[PhysicsObject], list[PhysicsObject]]: Gravity objects and no gravity objects.
+    """
+    return spawn_balls(width, height, amount, surface, seed), box(width, height, surface)
+
+
+def motors(width:int, height:int, amount:int = 100, surface:pygame.Surface = None, seed:int = 0) -> tuple[list[PhysicsObject], list[PhysicsObject]]:
+    """The two counter-rotating motor polygons from main.py inside the box, with balls raining onto them.
+
+    Args:
+        width (int): Width of the world.
+        height (int): Height of the world.
+        amount (int, optional): Amount of balls. Defaults to 100.
+        surface (pygame.Surface, optional): Surface to draw onto. Defaults to None (headless).
+        seed (int, optional): Seed for the spawn jitter. Defaults to 0.
+
+    Returns:
+        tuple[list[PhysicsObject], list[PhysicsObject]]: Gravity objects and no gravity objects.
+    """
+    motor_radius = min(width, height) * 0.28 #300 on a 1920x1080 window
+    motor_polygons = [Polygon(surface, Vector2(width//3, height//2), radius=motor_radius, point_amount=4, anchored=True, motor=0.005),
+                      Polygon(surface, Vector2(width//3*2, height//2), radius=motor_radius, point_amount=4, anchored=True, motor=-0.005)]
+    return spawn_balls(width, height//5, amount, surface, seed), motor_polygons + box(width, height, surface)
+
+
+def polygon_pile(width:int, height:int, amount:int = 100, surface:pygame.Surface = None, seed:int = 0) -> tuple[list[PhysicsObject], list[PhysicsObject]]:
+    """Triangles and squares piling up in the box, polygon pairs go through SAT unless the Solver gets sat_max_points=0.
+
+    Args:
+        width (int): Width of the world.
+        height (int): Height of the world.
+        amount (int, optional): Amount of polygons. Defaults to 100.
+        surface (pygame.Surface, optional): Surface to draw onto. Defaults to None (headless).
+        seed (int, optional): Seed for the spawn jitter. Defaults to 0.
+
+    Returns:
+        tuple[list[PhysicsObject], list[PhysicsObject]]: Gravity objects and no gravity objects.
+    """
+    polygons = []
+    for index, ball in enumerate(spawn_balls(width, height, amount, None, seed)): #reuse the ball layout as polygon centers
+        polygons.append(Polygon(surface, ball.position, radius=ball.radius, point_amount=3 + index % 2))
+    
+    return polygons, box(width, height, surface)
+
+
+def mixed(width:int, height:int, amount:int = 100, surface:pygame.Surface = None, seed:int = 0) -> tuple[list[PhysicsObject], list[PhysicsObject]]:
+    """A bit of everything, mostly balls with some polygons, falling onto slanted anchored lines in the box.
+
+    Args:
+        width (int): Width of the world.
+        height (int): Height of the world.
+        amount (int, optional): Amount of balls and polygons. Defaults to 100.
+        surface (pygame.Surface, optional): Surface to draw onto. Defaults to None (headless).
+        seed (int, optional): Seed for the spawn jitter. Defaults to 0.
+
+    Returns:
+        tuple[list[PhysicsObject], list[PhysicsObject]]: Gravity objects and no gravity objects.
+    """
+    grav_objects = []
+    for index, ball in enumerate(spawn_balls(width, height//2, amount, None, seed)):
+        if index % 5 == 0:
+            grav_objects.append(Polygon(surface, ball.position, radius=ball.radius, point_amount=3 + index % 3))
+        else:
+            grav_objects.append(Ball(surface, ball.position, ball.radius))
+
+    ramps = []
+    for ramp in range(4):
+        start = Vector2(width * (ramp/4 + 0.02), height * 0.6)
+        end = Vector2(width * (ramp/4 + 0.2), height * 0.6 + (-1)**ramp * height * 0.1)
+        ramps.append(Line(surface, (start + end)/2, [start, end], anchored=True))
+
+    return grav_objects, ramps + box(width, height, surface)
+
+
+SCENES = {
+    "ball_box": ball_box,
+    "motors": motors,
+    "polygon_pile": polygon_pile,
+    "mixed": mixed
+}
@@ -0,0 +1,397 @@
+import pygame
+from pygame import Vector2
+from solver import Solver, PhysicsObject, Ball, Line, Polygon
+from array import array
+import struct
+import sys
+try:
+    import numpy as np
+except ImportError: #only needed for Solvers running the "arrays" backend, which needs numpy anyway
+    np = None
+
+
+#Snapshot layout, everything little endian:
+#  header, see HEADER
+#  kinds      uint8   per object, KIND_BALL / KIND_LINE / KIND_POLYGON in Solver order (grav_objects then no_grav_objects)
+#  flags      uint8   per object, FLAG_ANCHORED / FLAG_GRAVITY / FLAG_PROCEDURAL
+#  colors     uint8   4 per object, RGBA
+#  balls      float64 7 per Ball, position, last position, acceleration and radius
+#  lines      float64 14 per Line, position, last position, acceleration, both points and both points relative to the position
+#  polygons   float64 9 per Polygon, position, last position, acceleration, rotation, motor and radius
+#  sizes      uint32  per Polygon, amount of points
+#  points     float64 2 per Polygon point, unrotated and relative to the position
+MAGIC = b"PPES"
+VERSION = 1
+HEADER = struct.Struct("<4sHIIIIIddI") #magic, version, objects, balls, lines, polygons, polygon points, gravity, time elapsed, subsets
+
+KIND_BALL = 0
+KIND_LINE = 1
+KIND_POLYGON = 2
+
+KINDS = {Ball: KIND_BALL, Line: KIND_LINE, Polygon: KIND_POLYGON} #exact types, subclasses fall back on isinstance
+
+FLAG_ANCHORED = 1
+FLAG_GRAVITY = 2
+FLAG_PROCEDURAL = 4
+
+
+def pack(typecode:str, values) -> bytes:
+    """Packs values into little endian bytes.
+
+    Args:
+        typecode (str): array typecode of the values.
+        values: Values to pack.
+
+    Returns:
+        bytes: The packed values.
+    """
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack(typecode:str, data:bytes, offset:int, count:int) -> tuple[array, int]:
+    """Reads little endian values packed with pack().
+
+    Args:
+        typecode (str): array typecode of the values.
+        data (bytes): Snapshot.
+        offset (int): Where the values start.
+        count (int): Amount of values.
+
+    Returns:
+        tuple[array, int]: The values and where the next section starts.
+    """
+    values = array(typecode)
+    end = offset + count * values.itemsize
+    if end > len(data):
+        raise ValueError("Snapshot is cut short")
+    values.frombytes(data[offset:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, end
+
+
+def object_kind(object:PhysicsObject) -> int:
+    kind = KINDS.get(type(object))
+    if kind is not None:
+        return kind
+    elif isinstance(object, Ball):
+        return KIND_BALL
+    elif isinstance(object, Line):
+        return KIND_LINE
+    elif isinstance(object, Polygon):
+        return KIND_POLYGON
+    raise ValueError(f"Can't snapshot [{type(object).__name__}] objects")
+
+
+def attached(balls:list[Ball], arrays) -> bool:
+    """Checks if every Ball has a row in a Solver's BallArrays, Balls appended since the last update() don't get one until the next.
+
+    Args:
+        balls (list[Ball]): Balls to check.
+        arrays (BallArrays): The Solver's BallArrays, None for the "objects" backend.
+
+    Returns:
+        bool: True if the Balls can be read and written by row.
+    """
+    return arrays is not None and bool(balls) and all(ball.arrays is arrays for ball in balls)
+
+
+def dump(solver:Solver) -> bytes:
+    """Packs the state of every object in a Solver, plus its gravity, subsets and time elapsed.
+
+    Args:
+        solver (Solver): Solver to snapshot.
+
+    Returns:
+        bytes: The snapshot.
+    """
+    objects = solver.grav_objects + solver.no_grav_objects
+    gravity_count = len(solver.grav_objects)
+
+    kinds = bytes([object_kind(object) for object in objects])
+    balls = [object for object, kind in zip(objects, kinds) if kind == KIND_BALL]
+    lines = [object for object, kind in zip(objects, kinds) if kind == KIND_LINE]
+    polygons = [object for object, kind in zip(objects, kinds) if kind == KIND_POLYGON]
+
+    arrays = solver.ball_arrays
+    batched = attached(balls, arrays) #Ball rows are already packed doubles, skip building a Vector2 per read
+    flags = bytearray(len(objects))
+    flags[:gravity_count] = bytes([FLAG_GRAVITY]) * gravity_count
+    for index, (object, kind) in enumerate(zip(objects, kinds)):
+        if not (batched and kind == KIND_BALL):
+            flags[index] |= (FLAG_ANCHORED * bool(object.anchored)) | (FLAG_PROCEDURAL * (kind == KIND_POLYGON and object.procedural))
+    if batched:
+        rows = np.array([ball.row for ball in balls], dtype=np.intp)
+        ball_indices = np.flatnonzero(np.frombuffer(kinds, dtype=np.uint8) == KIND_BALL)
+        np.frombuffer(flags, dtype=np.uint8)[ball_indices] |= arrays.anchored[rows].astype(np.uint8) * FLAG_ANCHORED
+
+    color_bytes = {} #objects mostly share a handful of color objects, so convert each one once
+    colors = []
+    for object in objects:
+        packed_color = color_bytes.get(id(object.color))
+        if packed_color is None:
+            packed_color = color_bytes[id(object.color)] = bytes(tuple(pygame.Color(object.color)))
+        colors.append(packed_color)
+    colors = b"".join(colors)
+
+    if batched:
+        ball_state = np.column_stack((arrays.positions[rows], arrays.last_positions[rows], arrays.accelerations[rows], arrays.radii[rows])).astype("<f8").tobytes()
+    else:
+        ball_values = []
+        for ball in balls:
+            position, last_position, acceleration = ball.position, ball.last_position, ball.acceleration
+            ball_values += (position[0], position[1], last_position[0], last_position[1], acceleration[0], acceleration[1], ball.radius)
+        ball_state = pack("d", ball_values)
+
+    line_values = []
+    for line in lines:
+        position, last_position, acceleration = line.position, line.last_position, line.acceleration
+        point_1, point_2 = line.points
+        relative_1, relative_2 = line.point_relatives
+        line_values += (position[0], position[1], last_position[0], last_position[1], acceleration[0], acceleration[1], point_1[0], point_1[1], point_2[0], point_2[1], relative_1[0], relative_1[1], relative_2[0], relative_2[1])
+
+    polygon_values = []
+    sizes = []
+    point_values = []
+    for polygon in polygons:
+        position, last_position, acceleration = polygon.position, polygon.last_position, polygon.acceleration
+        polygon_values += (position[0], position[1], last_position[0], last_position[1], acceleration[0], acceleration[1], polygon.rotation, polygon.motor, polygon.radius)
+        sizes.append(len(polygon.point_relatives))
+        for relative in polygon.point_relatives:
+            point_values += (relative[0], relative[1])
+
+    header = HEADER.pack(MAGIC, VERSION, len(objects), len(balls), len(lines), len(polygons), sum(sizes), solver.gravity, solver.time_elapsed, solver.subsets)
+    return b"".join((header, kinds, bytes(flags), colors, ball_state, pack("d", line_values), pack("d", polygon_values), pack("I", sizes), pack("d", point_values)))
+
+
+def read(data:bytes) -> dict:
+    """Unpacks every section of a snapshot.
+
+    Args:
+        data (bytes): Snapshot made by dump().
+
+    Returns:
+        dict: Header fields and sections by name.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Snapshot is cut short")
+    magic, version, object_count, ball_count, line_count, polygon_count, point_count, gravity, time_elapsed, subsets = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a snapshot")
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version [{version}]")
+
+    offset = HEADER.size
+    sections = {"gravity": gravity, "time_elapsed": time_elapsed, "subsets": subsets}
+    sections["kinds"], offset = unpack("B", data, offset, object_count)
+    sections["flags"], offset = unpack("B", data, offset, object_count)
+    sections["colors"], offset = unpack("B", data, offset, 4 * object_count)
+    sections["balls"], offset = unpack("d", data, offset, 7 * ball_count)
+    sections["lines"], offset = unpack("d", data, offset, 14 * line_count)
+    sections["polygons"], offset = unpack("d", data, offset, 9 * polygon_count)
+    sections["sizes"], offset = unpack("I", data, offset, polygon_count)
+    sections["points"], offset = unpack("d", data, offset, 2 * point_count)
+    return sections
+
+
+def build_objects(data:bytes, surface:pygame.Surface = None) -> tuple[list[PhysicsObject], list[PhysicsObject]]:
+    """Makes new objects from a snapshot without a Solver, for drawing recorded worlds.
+
+    Args:
+        data (bytes): Snapshot made by dump().
+        surface (pygame.Surface, optional): Surface for the objects to draw onto. Defaults to None (headless).
+
+    Returns:
+        tuple[list[PhysicsObject], list[PhysicsObject]]: Gravity objects and no gravity objects, in the same order as the Solver had them.
+    """
+    return objects_from_sections(read(data), surface)
+
+
+def objects_from_sections(sections:dict, surface:pygame.Surface = None) -> tuple[list[PhysicsObject], list[PhysicsObject]]:
+    flags = sections["flags"]
+    colors = sections["colors"]
+    balls = sections["balls"]
+    lines = sections["lines"]
+    polygons = sections["polygons"]
+    sizes = sections["sizes"]
+    points = sections["points"]
+
+    grav_objects = []
+    no_grav_objects = []
+    ball_index = line_index = polygon_index = point_index = 0
+    for index, kind in enumerate(sections["kinds"]):
+        anchored = bool(flags[index] & FLAG_ANCHORED)
+        color = tuple(colors[4*index:4*index + 4])
+
+        if kind == KIND_BALL:
+            values = balls[7*ball_index:7*ball_index + 7]
+            ball_index += 1
+            object = Ball(surface, Vector2(values[0], values[1]), values[6], color, anchored)
+        elif kind == KIND_LINE:
+            values = lines[14*line_index:14*line_index + 14]
+            line_index += 1
+            object = Line(surface, Vector2(values[0], values[1]), [Vector2(values[6], values[7]), Vector2(values[8], values[9])], color, anchored)
+            object.point_relatives = [Vector2(values[10], values[11]), Vector2(values[12], values[13])]
+        elif kind == KIND_POLYGON:
+            values = polygons[9*polygon_index:9*polygon_index + 9]
+            size = sizes[polygon_index]
+            polygon_index += 1
+            point_relatives = [Vector2(points[2*point], points[2*point + 1]) for point in range(point_index, point_index + size)]
+            point_index += size
+            object = Polygon(surface, Vector2(values[0], values[1]), point_relatives, values[8], size, color, anchored, values[7]) #placeholder points, replaced right after
+            object.set_point_relatives(point_relatives)
+            object.procedural = bool(flags[index] & FLAG_PROCEDURAL)
+            object.rotation = values[6]
+        else:
+            raise ValueError(f"Unknown object kind [{kind}]")
+
+        object.last_position = Vector2(values[2], values[3])
+        object.acceleration = Vector2(values[4], values[5])
+        if flags[index] & FLAG_GRAVITY:
+            grav_objects.append(object)
+        else:
+            no_grav_objects.append(object)
+
+    return grav_objects, no_grav_objects
+
+
+def build(data:bytes, surface:pygame.Surface = None, **solver_arguments) -> Solver:
+    """Makes a new Solver with new objects from a snapshot, for forking a world off into another run.
+
+    Args:
+        data (bytes): Snapshot made by dump().
+        surface (pygame.Surface, optional): Surface for the objects to draw onto. Defaults to None (headless).
+        **solver_arguments: Passed on to Solver, like broadphase and backend, which aren't part of the snapshot.
+
+    Returns:
+        Solver: The restored Solver.
+    """
+    sections = read(data)
+    grav_objects, no_grav_objects = objects_from_sections(sections, surface)
+    solver_arguments.setdefault("subsets", sections["subsets"])
+    solver_arguments.setdefault("gravity", sections["gravity"])
+    solver = Solver(grav_objects, no_grav_objects, **solver_arguments)
+    solver.time_elapsed = sections["time_elapsed"]
+    return solver
+
+
+def restore(solver:Solver, data:bytes) -> None:
+    """Puts a Solver back to a snapshot of itself, for going back to a checkpoint without rebuilding any objects.
+    The Solver has to hold the same kinds of objects in the same order and with the same gravity split as when the snapshot was made, anchored flags and colors get put back too.
+    GJK warm starts aren't part of the snapshot, so polygon contacts can come out different in the last few digits.
+
+    Args:
+        solver (Solver): Solver to restore.
+        data (bytes): Snapshot made by dump().
+    """
+    sections = read(data)
+    objects = solver.grav_objects + solver.no_grav_objects
+    if (len(objects) != len(sections["kinds"])) or any(object_kind(object) != kind for object, kind in zip(objects, sections["kinds"])):
+        raise ValueError("Snapshot doesn't match the Solver's objects, use build() instead")
+    flags = sections["flags"]
+    gravity_count = len(solver.grav_objects)
+    if any(bool(flag & FLAG_GRAVITY) != (index < gravity_count) for index, flag in enumerate(flags)):
+        raise ValueError("Snapshot doesn't match the Solver's gravity objects, use build() instead")
+
+    balls = [object for object in objects if isinstance(object, Ball)]
+    lines = [object for object in objects if isinstance(object, Line)]
+    polygons = [object for object in objects if isinstance(object, Polygon)]
+    for object in objects:
+        if object.sleeping: #woken up first, so they don't jump back to where they fell asleep
+            solver.wake(object)
+
+    colors = sections["colors"]
+    color_bytes = {} #same sharing as in dump()
+    for index, object in enumerate(objects):
+        if not isinstance(object, Ball):
+            object.anchored = bool(flags[index] & FLAG_ANCHORED)
+        if isinstance(object, Polygon):
+            object.procedural = bool(flags[index] & FLAG_PROCEDURAL)
+
+        packed_color = color_bytes.get(id(object.color))
+        if packed_color is None:
+            packed_color = color_bytes[id(object.color)] = bytes(tuple(pygame.Color(object.color)))
+        if packed_color != colors[4*index:4*index + 4].tobytes(): #colors that still match keep their object, so shared colors stay shared
+            object.color = tuple(colors[4*index:4*index + 4])
+
+    ball_values = sections["balls"]
+    ball_anchored = [bool(flag & FLAG_ANCHORED) for flag, kind in zip(flags, sections["kinds"]) if kind == KIND_BALL]
+    arrays = solver.ball_arrays
+    if attached(balls, arrays):
+        rows = [ball.row for ball in balls]
+        ball_state = np.frombuffer(ball_values, dtype=float).reshape(-1, 7)
+        arrays.positions[rows] = ball_state[:, 0:2]
+        arrays.last_positions[rows] = ball_state[:, 2:4]
+        arrays.accelerations[rows] = ball_state[:, 4:6]
+        arrays.radii[rows] = ball_state[:, 6]
+        arrays.anchored[rows] = ball_anchored
+    else:
+        for index, ball in enumerate(balls):
+            values = ball_values[7*index:7*index + 7]
+            ball.position = Vector2(values[0], values[1])
+            ball.last_position = Vector2(values[2], values[3])
+            ball.acceleration = Vector2(values[4], values[5])
+            ball.radius = values[6]
+            ball.anchored = ball_anchored[index]
+
+    line_values = sections["lines"]
+    for index, line in enumerate(lines):
+        values = line_values[14*index:14*index + 14]
+        line.position = Vector2(values[0], values[1])
+        line.last_position = Vector2(values[2], values[3])
+        line.acceleration = Vector2(values[4], values[5])
+        line.points = [Vector2(values[6], values[7]), Vector2(values[8], values[9])]
+        line.point_relatives = [Vector2(values[10], values[11]), Vector2(values[12], values[13])]
+
+    polygon_values = sections["polygons"]
+    sizes = sections["sizes"]
+    points = sections["points"]
+    point_index = 0
+    for index, polygon in enumerate(polygons):
+        values = polygon_values[9*index:9*index + 9]
+        size = sizes[index]
+        polygon.position = Vector2(values[0], values[1])
+        polygon.set_point_relatives([Vector2(points[2*point], points[2*point + 1]) for point in range(point_index, point_index + size)])
+        point_index += size
+        polygon.rotation = values[6]
+        polygon.motor = values[7]
+        polygon.radius = values[8]
+        polygon.last_position = Vector2(values[2], values[3])
+        polygon.acceleration = Vector2(values[4], values[5])
+
+    solver.gravity = sections["gravity"]
+    solver.subsets = sections["subsets"]
+    solver.time_elapsed = sections["time_elapsed"]
+    solver.gjk_cache = {} #warm starts and islands belong to the old state
+    solver.last_gjk_cache = {}
+    if solver.island_pool is not None:
+        solver.island_pool.contacts = None
+
+
+def save(solver:Solver, path:str) -> None:
+    """Writes a snapshot of a Solver to a file.
+
+    Args:
+        solver (Solver): Solver to snapshot.
+        path (str): File to write.
+    """
+    with open(path, "wb") as file:
+        file.write(dump(solver))
+
+
+def load(path:str, surface:pygame.Surface = None, **solver_arguments) -> Solver:
+    """Makes a new Solver from a snapshot file, see build().
+
+    Args:
+        path (str): File to read.
+        surface (pygame.Surface, optional): Surface for the objects to draw onto. Defaults to None (headless).
+        **solver_arguments: Passed on to Solver.
+
+    Returns:
+        Solver: The restored Solver.
+    """
+    with open(path, "rb") as file:
+        return build(file.read(), surface, **solver_arguments)
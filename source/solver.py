@@ -3,7 +3,14 @@ import pygame
 from pygame import Vector2, Vector3
 from pygame import gfxdraw
 import math
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+from profiler import Profiler
 # from copy import deepcopy
+try:
+    import numpy as np
+except ImportError: #only the "arrays" backend needs numpy
+    np = None
 
 
 # start = perf_counter()
@@ -12,6 +19,11 @@ import math
 
 
 
+MIN_SUBSET_RADIUS = 0.5 #smallest radius adaptive subsets scale by, half a pixel
+JACOBI_RELAXATION = 1.5 #batched Ball/Ball pushes get scaled by this over the ball's amount of contacts, summing them whole overshoots and keeps piles jittering
+EXACT_EPSILON = math.ulp(0.0) #Vector2 counts components closer than its epsilon as equal, with the smallest float only identical ones are
+
+
 def perpendicular(vector:Vector2) -> Vector2:
     """Finds the perpendicular of a Vector2, or any point.
 
@@ -32,11 +44,12 @@ class PhysicsObject():
         """Main physics object class for others to inherit.
 
         Args:
-            surface (pygame.Surface): Surface to draw onto.
+            surface (pygame.Surface): Surface to draw onto, None runs the object headless until attach_surface() is called.
             position (Vector2): Center of the object.
             color (pygame.Color, optional): Color of the object. Defaults to (200, 200, 200) (light gray).
             anchored (bool, optional): If the object is anchored into place or not. Defaults to False.
         """        
+        self.arrays = None #BallArrays storage when the Solver runs the "arrays" backend
         self.position = position
         self.last_position = position
         self.anchored = anchored
@@ -45,6 +58,11 @@ class PhysicsObject():
         self.color = color
         self.acceleration = Vector2(0,0)
 
+        self.sleeping = False #sleeping objects get skipped by the Solver until something wakes them up
+        self.sleep_timer = 0 #how long the object has been still for
+        self.sleep_position = None #where it fell asleep, moving it away from here wakes it
+        self.island = None #objects that fell asleep together and wake up together
+
 
     def update_position(self, delta_time: float) -> None:
         """Updates the position of the object.
@@ -73,15 +91,167 @@ class PhysicsObject():
         self.acceleration += acceleration
 
 
+    def attach_surface(self, surface:pygame.Surface) -> None:
+        """Attaches a surface to draw onto, lets objects built headless get rendered later.
+
+        Args:
+            surface (pygame.Surface): Surface to draw onto.
+        """        
+        self.surface = surface
+
+
+    def get_bounds(self) -> tuple[float, float, float, float]:
+        """Finds the axis aligned box around the object's bounding circle, used by the broadphases.
+
+        Returns:
+            tuple[float, float, float, float]: Left, top, right and bottom of the box.
+        """        
+        position = self.position
+        radius = self.radius
+        return (position[0] - radius, position[1] - radius, position[0] + radius, position[1] + radius)
+
+
+
+class RowVector(Vector2):
+    """Vector2 read out of a Ball's BallArrays row that writes any change made to it in place back through the Ball, so ball.position[1] -= .1 works with both backends.
+    Maths on it gives vectors that aren't tied to anything, Vector2(ball.position) makes a plain copy."""
+
+    def write_back(self) -> None:
+        """Sets the vector on the Ball it came from, the Ball's setter finds its current row."""
+        ball = getattr(self, "ball", None) #results of maths on a RowVector are RowVectors too but never got a Ball
+        if ball is not None:
+            setattr(ball, self.attribute, Vector2(self))
+
+    def __setitem__(self, index, value) -> None:
+        super().__setitem__(index, value)
+        self.write_back()
+
+    @property
+    def x(self) -> float:
+        return self[0]
+
+    @x.setter
+    def x(self, value:float) -> None:
+        self[0] = value
+
+    @property
+    def y(self) -> float:
+        return self[1]
+
+    @y.setter
+    def y(self, value:float) -> None:
+        self[1] = value
+
+
+def write_through(method):
+    """Wraps an in place Vector2 method so RowVector writes the result back."""
+    def in_place(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self.write_back()
+        return result
+    in_place.__name__ = method.__name__
+    return in_place
+
+for method_name in ["__iadd__", "__isub__", "__imul__", "__itruediv__", "__ifloordiv__", "update", "scale_to_length"] + [name for name in dir(Vector2) if name.endswith("_ip")]:
+    if hasattr(Vector2, method_name):
+        setattr(RowVector, method_name, write_through(getattr(Vector2, method_name)))
+
+
+def row_vector(ball:"Ball", attribute:str, array:"np.ndarray") -> RowVector:
+    """Reads a Ball's row into a RowVector.
+
+    Args:
+        ball (Ball): Ball the row belongs to.
+        attribute (str): Name of the Ball property the vector writes back through.
+        array (np.ndarray): BallArrays array to read from.
+
+    Returns:
+        RowVector: The row's values.
+    """
+    vector = RowVector(array[ball.row, 0], array[ball.row, 1])
+    vector.ball = ball
+    vector.attribute = attribute
+    return vector
+
 
 class Ball(PhysicsObject):
     """And he said, "let there be balls!" and there was balls. The simplest and easiest to compute."""
 
+    #with the "arrays" backend these read and write the Ball's BallArrays row, reading gives a RowVector so changing a component in place still sticks
+    @property
+    def position(self) -> Vector2:
+        if self.arrays is None:
+            return self._position
+        return row_vector(self, "position", self.arrays.positions)
+
+    @position.setter
+    def position(self, value:Vector2) -> None:
+        if self.arrays is None:
+            self._position = value
+        else:
+            self.arrays.positions[self.row] = (value[0], value[1])
+
+
+    @property
+    def last_position(self) -> Vector2:
+        if self.arrays is None:
+            return self._last_position
+        return row_vector(self, "last_position", self.arrays.last_positions)
+
+    @last_position.setter
+    def last_position(self, value:Vector2) -> None:
+        if self.arrays is None:
+            self._last_position = value
+        else:
+            self.arrays.last_positions[self.row] = (value[0], value[1])
+
+
+    @property
+    def acceleration(self) -> Vector2:
+        if self.arrays is None:
+            return self._acceleration
+        return row_vector(self, "acceleration", self.arrays.accelerations)
+
+    @acceleration.setter
+    def acceleration(self, value:Vector2) -> None:
+        if self.arrays is None:
+            self._acceleration = value
+        else:
+            self.arrays.accelerations[self.row] = (value[0], value[1])
+
+
+    @property
+    def radius(self) -> float:
+        if self.arrays is None:
+            return self._radius
+        return self.arrays.radii[self.row].item()
+
+    @radius.setter
+    def radius(self, value:float) -> None:
+        if self.arrays is None:
+            self._radius = value
+        else:
+            self.arrays.radii[self.row] = value
+
+
+    @property
+    def anchored(self) -> bool:
+        if self.arrays is None:
+            return self._anchored
+        return self.arrays.anchored[self.row].item()
+
+    @anchored.setter
+    def anchored(self, value:bool) -> None:
+        if self.arrays is None:
+            self._anchored = value
+        else:
+            self.arrays.anchored[self.row] = value
+
     def __init__(self, surface: pygame.Surface, position:Vector2, radius:float = 10, color: pygame.Color = (200, 200, 200), anchored:bool = False) -> None:
         """Balls, a simple and robust collision mesh.
 
         Args:
-            surface (pygame.Surface): Surface to draw onto.
+            surface (pygame.Surface): Surface to draw onto, None runs the object headless until attach_surface() is called.
             position (Vector2): Center of the ball.
             radius (float, optional): Radius of the ball. Defaults to 10.
             color (pygame.Color, optional): Color of the ball. Defaults to (200, 200, 200) (light gray).
@@ -91,21 +261,28 @@ class Ball(PhysicsObject):
         self.radius = radius
 
 
-    def draw_antialiased_wireframe(self) -> bool:
+    def draw_antialiased_wireframe(self, offset:Vector2 = None) -> bool:
         """Draws the antialiased wireframe of the object.
 
+        Args:
+            offset (Vector2, optional): Draws the object moved by this much, for render interpolation. Defaults to None (where it is).
+
         Returns:
             bool: Returns if the object was too far out in the case of an overflow error.
         """        
+        if self.surface is None: #headless
+            return False
+        
+        position = self.position if offset is None else self.position + offset
         try:
-            gfxdraw.aacircle(self.surface, int(self.position[0]), int(self.position[1]), self.radius, self.color)
+            gfxdraw.aacircle(self.surface, int(position[0]), int(position[1]), int(self.radius), self.color)
         except OverflowError:
             print(f"OBJECT [{self}] OUT OF BOUNDS, MOVING TO CENTER AND KILLING VELOCITY.")
             
             self.position = Vector2(self.surface.get_width()//2, self.surface.get_height()//2)
             self.last_position = Vector2(self.surface.get_width()//2, self.surface.get_height()//2)
             
-            gfxdraw.aacircle(self.surface, int(self.position[0]), int(self.position[1]), self.radius, self.color)
+            gfxdraw.aacircle(self.surface, int(self.position[0]), int(self.position[1]), int(self.radius), self.color)
             return True
 
     
@@ -128,7 +305,7 @@ class Line(PhysicsObject):
         """Lines, the building blocks of all polygons.
 
         Args:
-            surface (pygame.Surface): Surface to draw onto.
+            surface (pygame.Surface): Surface to draw onto, None runs the object headless until attach_surface() is called.
             position (Vector2): Center of the line.
             points (list[Vector2]): Points of the line.
             color (pygame.Color, optional): Color of the line. Defaults to (200, 200, 200) (light gray).
@@ -137,9 +314,12 @@ class Line(PhysicsObject):
         super().__init__(surface, position, color, anchored)
         self.points = points
         self.point_relatives = []
-        self.segment_vector = self.points[1] - self.points[0]
+        self.segment_vector = self.points[1] - self.points[0] #both points always move together, so this never changes
         self.normal = self.segment_vector.rotate(90)
         self.radius = (self.position - self.points[0]).length()
+
+        length_squared = self.segment_vector.length_squared()
+        self.inverse_length_squared = 1 / length_squared if length_squared else 0 #for projecting onto the line without a divide
         
         for point in self.points:
             self.point_relatives.append(point - self.position)
@@ -151,14 +331,21 @@ class Line(PhysicsObject):
             self.points[point] = self.point_relatives[point] + self.position
 
 
-    def draw_antialiased_wireframe(self) -> bool:
+    def draw_antialiased_wireframe(self, offset:Vector2 = None) -> bool:
         """Draws the antialiased wireframe of the object.
 
+        Args:
+            offset (Vector2, optional): Draws the object moved by this much, for render interpolation. Defaults to None (where it is).
+
         Returns:
             bool: Returns if the object was too far out in the case of an overflow error.
         """        
+        if self.surface is None: #headless
+            return False
+        
+        points = self.points if offset is None else [point + offset for point in self.points]
         try:
-            gfxdraw.line(self.surface, int(self.points[0][0]), int(self.points[0][1]), int(self.points[1][0]), int(self.points[1][1]), self.color)
+            gfxdraw.line(self.surface, int(points[0][0]), int(points[0][1]), int(points[1][0]), int(points[1][1]), self.color)
         
         except OverflowError:
             print(f"OBJECT [{self}] OUT OF BOUNDS, MOVING TO CENTER AND KILLING VELOCITY.")
@@ -194,7 +381,7 @@ class Polygon(PhysicsObject):
         """A polygon physics object that you can manually build or input a radius and points for a procedural generation.
 
         Args:
-            surface (pygame.Surface): Surface to draw onto.
+            surface (pygame.Surface): Surface to draw onto, None runs the object headless until attach_surface() is called.
             position (Vector2): Center of the polygon.
             points (list[Vector2], optional): The positions of the polygon's points; needs at least 3 points. Defaults to autogenerated points based on the center and radius if there is not enough points.
             radius (float): Radius of the procedural polygon.
@@ -204,14 +391,14 @@ class Polygon(PhysicsObject):
         """        
 
         super().__init__(surface, position, color, anchored)
-        self.points = points
         self.radius = radius
         self.point_amount = point_amount
         self.rotation = 0
+        self.points_position = None #copy of the position the world points were last built at
         self.motor = motor
         
-        if len(self.points) < 3:
-            self.points = []
+        if len(points) < 3:
+            points = []
             theta = 0
             coordinates = Vector2(0,0)
             self.procedural = True
@@ -220,7 +407,7 @@ class Polygon(PhysicsObject):
                 #theta = 6.28 / point amount * point_number + fixing rotation
                 coordinates = Vector2((self.position[0] + self.radius * math.cos(theta)), (self.position[1] + self.radius *math.sin(theta))) #magic?
                 # position  =         ( x   +   radius   *   cosine(theta) ), ( y   +   radius   *   sine(theta) ) 
-                self.points.append(coordinates) #append vector
+                points.append(coordinates) #append vector
 
         else:
             self.procedural = False
@@ -228,55 +415,109 @@ class Polygon(PhysicsObject):
         if self.radius is None:
             self.radius = 0
             max_radius = float(-9999999)
-            for point in self.points:
+            for point in points:
                 possible_radius = (self.position - point).length()
                 if possible_radius > max_radius:
                     max_radius = possible_radius
             self.radius = max_radius
         
+        self.points = points #works out point_relatives
         
-        self.point_relatives = []    
-        
-        for point in self.points:
-            self.point_relatives.append(point - self.position)
+
+    #world space points get rebuilt from point_relatives, position and rotation the first time they're needed after one of those changed
+    #the position they were built at is kept too, so editing a component in place (polygon.position[1] -= .1) still gets noticed
+
+    @property
+    def position(self) -> Vector2:
+        return self._position
+
+    @position.setter
+    def position(self, value:Vector2) -> None:
+        self._position = value
+        self.points_dirty = True
+
+    @property
+    def rotation(self) -> float:
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value:float) -> None:
+        self._rotation = value
+        radians = math.radians(value)
+        self.rotation_cos = math.cos(radians) #only worked out once per change instead of per point
+        self.rotation_sin = math.sin(radians)
+        self.points_dirty = True
+
+    @property
+    def points(self) -> list[Vector2]:
+        if self.points_dirty or self.points_position != self._position:
+            self.points_position = Vector2(self._position)
+            self.points_position.epsilon = EXACT_EPSILON #Vector2 compares with the left side's epsilon, the default one would miss tiny moves
+            x, y = self._position
+            cos = self.rotation_cos
+            sin = self.rotation_sin
+            self._points = [Vector2(cos*relative_x - sin*relative_y + x, sin*relative_x + cos*relative_y + y) for relative_x, relative_y in self.point_relatives]
+            self.points_dirty = False
+        return self._points
+
+    @points.setter
+    def points(self, value:list[Vector2]) -> None:
+        x, y = self._position
+        cos = self.rotation_cos
+        sin = self.rotation_sin
+        self.set_point_relatives([Vector2(cos*(point[0] - x) + sin*(point[1] - y), cos*(point[1] - y) - sin*(point[0] - x)) for point in value]) #unrotated so the points end up where they were given
+
+
+    def set_point_relatives(self, point_relatives:list[Vector2]) -> None:
+        """Sets the shape straight from unrotated points relative to the position, the points setter goes through here too.
+
+        Args:
+            point_relatives (list[Vector2]): Unrotated points relative to the position.
+        """        
+        self.point_relatives = point_relatives
+        self.points_dirty = True
+
+        self.edge_normals = [] #unrotated unit normals of the edges for SAT, parallel edges share one
+        for index, point in enumerate(self.point_relatives):
+            edge = self.point_relatives[(index + 1) % len(self.point_relatives)] - point
+            if edge.length_squared() == 0:
+                continue
+            normal = perpendicular(edge).normalize()
+            if all(abs(normal.cross(other_normal)) > 1e-9 for other_normal in self.edge_normals):
+                self.edge_normals.append(normal)
         
             
     def update_position(self, delta_time: float) -> None:
         super().update_position(delta_time)
 
-        self.rotation += self.motor
-        if self.rotation >= 360:
-            self.rotation-=360
-        elif self.rotation <= -360:
-            self.rotation+=360
-
-        for point in range(len(self.points)):
-            self.points[point] = self.point_relatives[point] + self.position #cheaper than velocity calculation for all points
-
-
-            temporary_point = self.points[point]
-            self.points[point] = Vector2(int(math.cos(math.radians(self.rotation)) * (temporary_point[0] - self.position[0]) - math.sin(math.radians(self.rotation)) * (temporary_point[1] - self.position[1]) + self.position[0]), 
-                                         int(math.sin(math.radians(self.rotation)) * (temporary_point[0] - self.position[0]) + math.cos(math.radians(self.rotation)) * (temporary_point[1] - self.position[1]) + self.position[1]))
+        if self.motor:
+            rotation = self._rotation + self.motor
+            if rotation >= 360:
+                rotation-=360
+            elif rotation <= -360:
+                rotation+=360
+            self.rotation = rotation
 
     
-    def draw_antialiased_wireframe(self) -> bool:
+    def draw_antialiased_wireframe(self, offset:Vector2 = None) -> bool:
         """Draws the antialiased wireframe of the object.
 
+        Args:
+            offset (Vector2, optional): Draws the object moved by this much, for render interpolation. Defaults to None (where it is).
+
         Returns:
             bool: Returns if the object was too far out in the case of an overflow error.
         """        
+        if self.surface is None: #headless
+            return False
+        
+        points = self.points if offset is None else [point + offset for point in self.points]
         try:
-            gfxdraw.aapolygon(self.surface, self.points, self.color)
+            gfxdraw.aapolygon(self.surface, points, self.color)
         
         except OverflowError:
             print(f"OBJECT [{self}] OUT OF BOUNDS, MOVING TO CENTER AND KILLING VELOCITY.")
             
-            new_points = []
-            for point in self.points:
-                new_points.append(point - self.position)
-            
-            self.points = new_points
-            # self.points = deepcopy(new_points)
             self.position = Vector2(self.surface.get_width()//2, self.surface.get_height()//2)
             self.last_position = Vector2(self.surface.get_width()//2, self.surface.get_height()//2)
             
@@ -299,24 +540,1187 @@ class Polygon(PhysicsObject):
     
 
 
-class Simplex():
-    
-    def __init__(self) -> None:
-        self.points = []
-        self.size = 0
-    
-    def push_front(self, point) -> list:
-        self.points.insert(1, point)
-        if self.size > 3:
-            self.points.pop()
-        self.size = min(self.size+1, 3)
+class Simplex():
+    
+    def __init__(self) -> None:
+        self.points = []
+        self.size = 0
+    
+    def push_front(self, point) -> list:
+        self.points.insert(0, point) #newest point first, line() and triangle() rely on it
+        if len(self.points) > 3:
+            self.points.pop()
+        self.size = len(self.points)
+        
+
+
+def ball_pair_pushes(positions:"np.ndarray", radii:"np.ndarray", anchored:"np.ndarray", resting:"np.ndarray", rows_1:"np.ndarray", rows_2:"np.ndarray") -> tuple["np.ndarray", "np.ndarray", "np.ndarray", float]:
+    """Works out the pushes of a batch of Ball/Ball pairs from the same starting positions, same maths as Solver.ball_on_ball.
+    Nothing gets moved, so it works on BallArrays rows as well as on the copies the island workers see.
+
+    Args:
+        positions (np.ndarray): Position of every row.
+        radii (np.ndarray): Radius of every row.
+        anchored (np.ndarray): Which rows are anchored.
+        resting (np.ndarray): Which rows are sleeping or anchored, two resting balls can't push each other around.
+        rows_1 (np.ndarray): Rows of ball one of every pair.
+        rows_2 (np.ndarray): Rows of ball two of every pair.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, float]: Which of the pairs were colliding (indices into rows_1 and rows_2), the push to add onto their ball one and to take off their ball two, and the deepest overlap.
+    """    
+    indices = np.flatnonzero(~(resting[rows_1] & resting[rows_2]))
+    rows_1 = rows_1[indices]
+    rows_2 = rows_2[indices]
+
+    collision_axis = positions[rows_1] - positions[rows_2]
+    distance = np.sqrt(np.einsum("ij,ij->i", collision_axis, collision_axis))
+    delta = radii[rows_1] + radii[rows_2] - distance
+    
+    colliding = delta > 0
+    if not colliding.any():
+        no_push = np.zeros((0, 2))
+        return indices[colliding], no_push, no_push, 0.0
+    
+    indices = indices[colliding]
+    rows_1 = rows_1[colliding]
+    rows_2 = rows_2[colliding]
+    collision_axis = collision_axis[colliding]
+    distance = distance[colliding]
+    delta = delta[colliding]
+
+    #balls sitting exactly on top of each other get no push, like the ZeroDivisionError fallback
+    share = np.where(anchored[rows_1] | anchored[rows_2], 0.75, 0.5) #same as Solver.ball_on_ball
+    scale = np.divide(share * delta, distance, out=np.zeros_like(distance), where=distance > 0)
+    push = collision_axis * scale[:, None]
+
+    free = ~anchored
+    return indices, push * free[rows_1][:, None], push * free[rows_2][:, None], float(delta.max())
+
+
+def contact_scales(rows_1:"np.ndarray", rows_2:"np.ndarray", count:int) -> "np.ndarray":
+    """Works out how much of its summed Jacobi pushes every row keeps, a ball squeezed by n others would get pushed up to n times too far otherwise.
+
+    Args:
+        rows_1 (np.ndarray): Rows of ball one of every colliding pair.
+        rows_2 (np.ndarray): Rows of ball two of every colliding pair.
+        count (int): Amount of rows.
+
+    Returns:
+        np.ndarray: Scale of every row, JACOBI_RELAXATION over its amount of contacts and never above 1.
+    """    
+    contacts = np.bincount(rows_1, minlength=count) + np.bincount(rows_2, minlength=count)
+    return np.minimum(1, JACOBI_RELAXATION / np.maximum(contacts, 1))
+
+
+class BallArrays():
+    """Structure of arrays storage for Balls, their state lives in contiguous NumPy arrays so gravity and integration run as a few vector operations.
+    Attached Balls read and write their own row, reading .position gives a RowVector that writes in place changes back to the row."""
+
+    def __init__(self, capacity:int = 64) -> None:
+        """Ball storage that grows as Balls get attached.
+
+        Args:
+            capacity (int, optional): Starting amount of rows. Defaults to 64.
+        """        
+        if np is None:
+            raise ImportError("BallArrays needs numpy installed")
+        
+        self.count = 0
+        self.balls = []
+        self.positions = np.zeros((capacity, 2))
+        self.last_positions = np.zeros((capacity, 2))
+        self.accelerations = np.zeros((capacity, 2))
+        self.radii = np.zeros(capacity)
+        self.anchored = np.zeros(capacity, dtype=bool)
+        self.sleeping = np.zeros(capacity, dtype=bool)
+        self.gravity_rows = np.zeros(0, dtype=np.intp)
+        self.worst_penetration = 0.0 #deepest overlap the batched solves have seen since the Solver last reset it
+        self.detached = 0 #goes up every time a detach moves rows around, so anything holding onto rows knows they're stale
+
+
+    def grow(self) -> None:
+        """Doubles the amount of rows."""        
+        capacity = len(self.radii) * 2
+        for name in ("positions", "last_positions", "accelerations", "radii", "anchored", "sleeping"):
+            old_array = getattr(self, name)
+            new_array = np.zeros((capacity,) + old_array.shape[1:], dtype=old_array.dtype)
+            new_array[:self.count] = old_array[:self.count]
+            setattr(self, name, new_array)
+
+
+    def attach(self, ball:Ball) -> None:
+        """Moves a Ball's state into a new row.
+
+        Args:
+            ball (Ball): Ball to attach.
+        """        
+        if ball.arrays is not None and ball.arrays is not self: #moving between Solvers, the old row goes and its state comes back onto the Ball first
+            ball.arrays.detach(ball)
+
+        if self.count == len(self.radii):
+            self.grow()
+        
+        row = self.count
+        self.positions[row] = (ball._position[0], ball._position[1])
+        self.last_positions[row] = (ball._last_position[0], ball._last_position[1])
+        self.accelerations[row] = (ball._acceleration[0], ball._acceleration[1])
+        self.radii[row] = ball._radius
+        self.anchored[row] = ball._anchored
+        self.sleeping[row] = ball.sleeping
+
+        ball.arrays = self
+        ball.row = row
+        self.balls.append(ball)
+        self.count += 1
+
+
+    def detach(self, ball:Ball) -> None:
+        """Moves a Ball's state back onto the Ball and fills its row with the last row.
+
+        Args:
+            ball (Ball): Ball to detach.
+        """        
+        row = ball.row
+        ball._position = Vector2(ball.position) #plain copies, not RowVectors tied to this row
+        ball._last_position = Vector2(ball.last_position)
+        ball._acceleration = Vector2(ball.acceleration)
+        ball._radius = ball.radius
+        ball._anchored = ball.anchored
+        ball.arrays = None
+
+        last_row = self.count - 1
+        if row != last_row:
+            for array in (self.positions, self.last_positions, self.accelerations, self.radii, self.anchored, self.sleeping):
+                array[row] = array[last_row]
+            moved_ball = self.balls[last_row]
+            moved_ball.row = row
+            self.balls[row] = moved_ball
+        
+        self.balls.pop()
+        self.count -= 1
+        self.detached += 1
+
+
+    def sync(self, grav_objects:list[PhysicsObject], no_grav_objects:list[PhysicsObject]) -> None:
+        """Attaches new Balls, detaches Balls that left the Solver and works out which rows get gravity.
+
+        Args:
+            grav_objects (list[PhysicsObject]): Objects with gravity.
+            no_grav_objects (list[PhysicsObject]): Objects without gravity.
+        """        
+        present = set()
+        gravity_rows = []
+
+        for object in grav_objects:
+            if isinstance(object, Ball):
+                if object.arrays is not self:
+                    self.attach(object)
+                present.add(object)
+                gravity_rows.append(object.row)
+
+        for object in no_grav_objects:
+            if isinstance(object, Ball):
+                if object.arrays is not self:
+                    self.attach(object)
+                present.add(object)
+
+        if len(present) != self.count:
+            for ball in [ball for ball in self.balls if ball not in present]:
+                self.detach(ball)
+            gravity_rows = [object.row for object in grav_objects if isinstance(object, Ball)] #rows moved around
+
+        self.gravity_rows = np.array(gravity_rows, dtype=np.intp)
+
+
+    def apply_gravity(self, gravity:float) -> None:
+        """Accelerates every gravity affected row downwards, sleeping rows are left alone.
+
+        Args:
+            gravity (float): The amount of gravity to apply.
+        """        
+        rows = self.gravity_rows
+        if self.sleeping[:self.count].any():
+            rows = rows[~self.sleeping[rows]]
+        self.accelerations[rows, 1] += gravity
+
+
+    def update_positions(self, delta_time:float) -> None:
+        """Verlet integrates every awake row at once, same maths as PhysicsObject.update_position.
+
+        Args:
+            delta_time (float): The amount of time passed since last update.
+        """        
+        count = self.count
+        sleeping = self.sleeping[:count]
+        
+        if not sleeping.any():
+            positions = self.positions[:count]
+            last_positions = self.last_positions[:count]
+
+            displacement = positions - last_positions
+            last_positions[:] = positions
+            positions += displacement
+            positions += self.accelerations[:count] * (delta_time*delta_time)
+            self.accelerations[:count] = 0
+            return
+        
+        rows = np.flatnonzero(~sleeping)
+        positions = self.positions[rows]
+        displacement = positions - self.last_positions[rows]
+        self.last_positions[rows] = positions
+        self.positions[rows] = positions + displacement + self.accelerations[rows] * (delta_time*delta_time)
+        self.accelerations[rows] = 0
+
+
+    def touching_pairs(self, block_size:int = 1 << 20) -> tuple["np.ndarray", "np.ndarray"]:
+        """Checks every pair of rows and keeps the ones close enough to touch, for the brute force broadphase.
+        Rows get checked a block at a time so 10k balls never need all n² pairs in memory at once, it's still n² work.
+
+        Args:
+            block_size (int, optional): About how many pairs get checked at once. Defaults to 1 << 20.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Rows of ball one and ball two of every pair, ball one always has the lower row, in the same order np.triu_indices would give.
+        """
+        count = self.count
+        positions = self.positions[:count]
+        radii = self.radii[:count]
+        columns = np.arange(count)
+        block_rows = max(1, block_size // max(count, 1))
+
+        found_1 = [np.zeros(0, dtype=np.intp)]
+        found_2 = [np.zeros(0, dtype=np.intp)]
+        for start in range(0, count, block_rows):
+            stop = min(count, start + block_rows)
+            offset_x = positions[None, :, 0] - positions[start:stop, 0, None]
+            offset_y = positions[None, :, 1] - positions[start:stop, 1, None]
+            reach = radii[None, :] + radii[start:stop, None] + 1e-6 #a little slack, ball_pair_pushes makes the exact call
+            close = (offset_x*offset_x + offset_y*offset_y < reach*reach) & (columns[None, :] > columns[start:stop, None])
+            rows_1, rows_2 = np.nonzero(close)
+            found_1.append(rows_1 + start)
+            found_2.append(rows_2)
+        return np.concatenate(found_1), np.concatenate(found_2)
+
+
+    def solve_ball_pairs(self, rows_1:"np.ndarray", rows_2:"np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+        """Resolves a whole batch of Ball/Ball pairs at once, same pushes as Solver.ball_on_ball.
+        Every correction is worked out from the same starting positions and the ones landing on the same Ball get added up (Jacobi style), then scaled by contact_scales().
+
+        Args:
+            rows_1 (np.ndarray): Rows of ball one of every pair.
+            rows_2 (np.ndarray): Rows of ball two of every pair.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Rows of the pairs that were colliding.
+        """        
+        count = self.count
+        indices, push_1, push_2, worst_penetration = ball_pair_pushes(self.positions, self.radii, self.anchored, self.sleeping | self.anchored, rows_1, rows_2)
+        rows_1 = rows_1[indices]
+        rows_2 = rows_2[indices]
+        if not len(indices):
+            return rows_1, rows_2
+        self.worst_penetration = max(self.worst_penetration, worst_penetration)
+
+        scales = contact_scales(rows_1, rows_2, count)
+        self.positions[:count, 0] += (np.bincount(rows_1, push_1[:, 0], count) - np.bincount(rows_2, push_2[:, 0], count)) * scales
+        self.positions[:count, 1] += (np.bincount(rows_1, push_1[:, 1], count) - np.bincount(rows_2, push_2[:, 1], count)) * scales
+        return rows_1, rows_2
+
+
+    def solve_line_pairs(self, lines:list[Line], line_indices:"np.ndarray", rows:"np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+        """Resolves a whole batch of Line/Ball pairs at once, same checks and pushes as Solver.line_on_ball.
+        Corrections landing on the same Ball or Line get added up (Jacobi style).
+
+        Args:
+            lines (list[Line]): Lines the line indices point into.
+            line_indices (np.ndarray): Index into lines of every pair.
+            rows (np.ndarray): Ball row of every pair.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Line indices and ball rows of the pairs that were colliding.
+        """        
+        if (len(rows) == 0) or (len(lines) == 0):
+            return line_indices[:0], rows[:0]
+        
+        count = self.count
+        positions = self.positions
+
+        line_data = np.array([(line.points[0][0], line.points[0][1], line.segment_vector[0], line.segment_vector[1], line.inverse_length_squared, 
+                               line.position[0], line.position[1], line.radius, line.anchored) for line in lines], dtype=float)
+        line_data = line_data[line_indices]
+
+        moving = ~(self.sleeping[rows] & (line_data[:, 8] != 0)) #sleeping balls on anchored lines stay put
+        line_data = line_data[moving]
+        line_indices = line_indices[moving]
+        rows = rows[moving]
+
+        start = line_data[:, 0:2]
+        segment = line_data[:, 2:4]
+        inverse_length_squared = line_data[:, 4]
+
+        ball_positions = positions[rows]
+        radii = self.radii[rows]
+
+        line_offset = line_data[:, 5:7] - ball_positions #same bounding circle skip as Solver.collide
+        in_reach = (radii + line_data[:, 7])**2 >= np.einsum("ij,ij->i", line_offset, line_offset)
+
+        axis_1 = start - ball_positions
+        axis_2 = axis_1 + segment
+        distance_1 = np.sqrt(np.einsum("ij,ij->i", axis_1, axis_1))
+        distance_2 = np.sqrt(np.einsum("ij,ij->i", axis_2, axis_2))
+
+        #closest point on the infinite line, then the same 0.1 buffer check as Solver.line_on_point
+        projection = -np.einsum("ij,ij->i", axis_1, segment) * inverse_length_squared
+        axis_3 = axis_1 + segment * projection[:, None]
+        distance_3 = np.sqrt(np.einsum("ij,ij->i", axis_3, axis_3))
+        line_length = np.sqrt(np.einsum("ij,ij->i", segment, segment))
+        on_segment = line_length * np.maximum(1, np.abs(2*projection - 1)) < line_length + 0.1
+
+        hit_1 = in_reach & (distance_1 < radii)
+        hit_2 = in_reach & ~hit_1 & (distance_2 < radii)
+        hit_3 = in_reach & ~hit_1 & ~hit_2 & on_segment & (distance_3 <= radii)
+
+        colliding = hit_1 | hit_2 | hit_3
+        if not colliding.any():
+            return line_indices[colliding], rows[colliding]
+
+        collision_axis = np.where(hit_1[:, None], axis_1, np.where(hit_2[:, None], axis_2, axis_3))[colliding]
+        distance = np.where(hit_1, distance_1, np.where(hit_2, distance_2, distance_3))[colliding]
+        rows = rows[colliding]
+        line_indices = line_indices[colliding]
+        delta = radii[colliding] - distance
+        self.worst_penetration = max(self.worst_penetration, delta.max())
+
+        share = np.where((line_data[colliding, 8] != 0) | self.anchored[rows], 0.75, 0.5) #same as Solver.line_on_ball
+        scale = np.divide(share * delta, distance, out=np.zeros_like(distance), where=distance > 0)
+        push = collision_axis * scale[:, None]
+
+        ball_push = push * (~self.anchored[rows])[:, None]
+        positions[:count, 0] -= np.bincount(rows, ball_push[:, 0], count)
+        positions[:count, 1] -= np.bincount(rows, ball_push[:, 1], count)
+
+        line_push = push * (line_data[colliding, 8] == 0)[:, None]
+        if line_push.any(): #walls are almost always anchored
+            line_push_x = np.bincount(line_indices, line_push[:, 0], len(lines))
+            line_push_y = np.bincount(line_indices, line_push[:, 1], len(lines))
+            for line_index in np.flatnonzero((line_push_x != 0) | (line_push_y != 0)):
+                line = lines[line_index]
+                line_push_vector = Vector2(line_push_x[line_index], line_push_y[line_index])
+                line.points[0] += line_push_vector
+                line.points[1] += line_push_vector
+
+        return line_indices, rows
+
+
+
+island_buffers = {} #shared memory name to (SharedMemory, array), every island worker keeps its own
+
+
+def attach_island_buffers(layout:tuple[tuple[str, tuple, str], ...]) -> list["np.ndarray"]:
+    """Maps the IslandPool's shared buffers into this worker, only the first task after they get (re)allocated pays for it.
+
+    Args:
+        layout (tuple[tuple[str, tuple, str], ...]): Shared memory name, shape and dtype of every buffer.
+
+    Returns:
+        list[np.ndarray]: The buffers, in the same order as the layout.
+    """    
+    names = {name for name, shape, dtype in layout}
+    for name in [name for name in island_buffers if name not in names]: #buffers that got outgrown
+        memory, array = island_buffers.pop(name)
+        del array #the view has to go before the memory can close
+        memory.close()
+
+    arrays = []
+    for name, shape, dtype in layout:
+        buffer = island_buffers.get(name)
+        if buffer is None:
+            memory = shared_memory.SharedMemory(name=name) #workers share the IslandPool's resource tracker, registering again is a no-op and only release() unregisters
+            buffer = island_buffers[name] = (memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf))
+        arrays.append(buffer[1])
+    return arrays
+
+
+def solve_island_chunk(task:tuple[tuple, int, int]) -> float:
+    """Solves a run of whole islands inside a worker process, reading the starting state from shared memory and writing the corrections of its own balls back.
+    No two chunks share a free ball, so the writes never overlap.
+
+    Args:
+        task (tuple[tuple, int, int]): Buffer layout, first and one past the last pair of the chunk.
+
+    Returns:
+        float: Deepest overlap in the chunk.
+    """    
+    layout, start, end = task
+    positions, radii, anchored, resting, pairs, colliding, corrections = attach_island_buffers(layout)
+
+    rows_1 = pairs[start:end, 0]
+    rows_2 = pairs[start:end, 1]
+    indices, push_1, push_2, worst_penetration = ball_pair_pushes(positions, radii, anchored, resting, rows_1, rows_2)
+    if not len(indices):
+        return 0.0
+    colliding[start + indices] = True
+    rows_1 = rows_1[indices]
+    rows_2 = rows_2[indices]
+
+    #sum on the chunk's own rows only, anchored rows never move and can be shared between chunks so they don't get written
+    rows = np.union1d(rows_1, rows_2)
+    local_1 = np.searchsorted(rows, rows_1)
+    local_2 = np.searchsorted(rows, rows_2)
+    free = ~anchored[rows]
+    corrections[rows[free], 0] = (np.bincount(local_1, push_1[:, 0], len(rows)) - np.bincount(local_2, push_2[:, 0], len(rows)))[free]
+    corrections[rows[free], 1] = (np.bincount(local_1, push_1[:, 1], len(rows)) - np.bincount(local_2, push_2[:, 1], len(rows)))[free]
+    return worst_penetration
+
+
+
+class IslandPool():
+    """Solves the Ball/Ball pairs of the "arrays" backend across worker processes, one island at a time.
+    Islands are groups of Balls that touched each other in the last subset, pairs inside an island go to the workers and the few pairs bridging two islands get added in afterwards.
+    Every Ball's pushes get added up in the same order whatever the amount of workers, so runs stay reproducible."""
+
+    def __init__(self, arrays:BallArrays, workers:int, chunks_per_worker:int = 4) -> None:
+        """Worker pool and shared memory for island solves.
+
+        Args:
+            arrays (BallArrays): Storage of the Balls to solve.
+            workers (int): Amount of worker processes.
+            chunks_per_worker (int, optional): How many runs of islands every worker gets per subset, more evens out uneven islands but costs more messages. Defaults to 4.
+        """        
+        self.arrays = arrays
+        self.workers = workers
+        self.chunks_per_worker = chunks_per_worker
+        resource_tracker.ensure_running() #started before the fork so the workers share it instead of each starting one that frees the buffers again on exit
+        self.pool = multiprocessing.Pool(workers)
+
+        self.memories = []
+        self.buffers = {}
+        self.layout = ()
+        self.capacity = 0
+        self.pair_capacity = 0
+
+        self.contacts = None #rows of the free Balls that touched in the last subset
+        self.detached = arrays.detached
+
+
+    def allocate(self, capacity:int, pair_capacity:int) -> None:
+        """Replaces the shared buffers with bigger ones, workers pick the new ones up from the layout of their next task.
+
+        Args:
+            capacity (int): Amount of Ball rows.
+            pair_capacity (int): Amount of pairs.
+        """        
+        self.release()
+        buffers = [("positions", (capacity, 2), np.float64), ("radii", (capacity,), np.float64), ("anchored", (capacity,), np.bool_), ("resting", (capacity,), np.bool_),
+                   ("pairs", (pair_capacity, 2), np.intp), ("colliding", (pair_capacity,), np.bool_), ("corrections", (capacity, 2), np.float64)]
+
+        layout = []
+        for name, shape, dtype in buffers:
+            dtype = np.dtype(dtype)
+            memory = shared_memory.SharedMemory(create=True, size=max(1, math.prod(shape) * dtype.itemsize))
+            self.memories.append(memory)
+            self.buffers[name] = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+            layout.append((memory.name, shape, dtype.str))
+
+        self.layout = tuple(layout)
+        self.capacity = capacity
+        self.pair_capacity = pair_capacity
+
+
+    def release(self) -> None:
+        """Frees the shared buffers."""        
+        self.buffers = {} #views have to go before the memory can close
+        for memory in self.memories:
+            memory.close()
+            memory.unlink()
+        self.memories = []
+
+
+    def close(self) -> None:
+        """Stops the workers and frees the shared buffers."""        
+        self.pool.terminate()
+        self.pool.join()
+        self.release()
+
+
+    def find_islands(self, count:int) -> "np.ndarray":
+        """Labels every row with the island it's in, using the contacts of the last subset.
+
+        Args:
+            count (int): Amount of rows.
+
+        Returns:
+            np.ndarray: Island of every row, the lowest row in it. Balls that touched nothing are islands of their own.
+        """        
+        labels = np.arange(count, dtype=np.intp)
+        if self.contacts is None or not len(self.contacts[0]):
+            return labels
+        
+        rows_1, rows_2 = self.contacts
+        while True: #spread the lowest label along the contacts, jumping to the label's label so long chains of balls don't take forever
+            lowest = np.minimum(labels[rows_1], labels[rows_2])
+            new_labels = labels.copy()
+            np.minimum.at(new_labels, rows_1, lowest)
+            np.minimum.at(new_labels, rows_2, lowest)
+            new_labels = new_labels[new_labels]
+            if np.array_equal(new_labels, labels):
+                return labels
+            labels = new_labels
+
+
+    def solve(self, rows_1:"np.ndarray", rows_2:"np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+        """Drop in for BallArrays.solve_ball_pairs, same Jacobi pushes but islands get solved by the workers at the same time.
+
+        Args:
+            rows_1 (np.ndarray): Rows of ball one of every pair.
+            rows_2 (np.ndarray): Rows of ball two of every pair.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Rows of the pairs that were colliding.
+        """        
+        arrays = self.arrays
+        count = arrays.count
+        if self.detached != arrays.detached: #rows moved around, the contacts don't point at the right balls anymore
+            self.contacts = None
+            self.detached = arrays.detached
+
+        if count > self.capacity or len(rows_1) > self.pair_capacity:
+            self.allocate(max(count, 2 * self.capacity, 64), max(len(rows_1), 2 * self.pair_capacity, 256))
+        buffers = self.buffers
+        anchored = arrays.anchored[:count]
+
+        #anchored balls work like the ground, they never join islands together and their pairs go with the other ball's island
+        labels = self.find_islands(count)
+        islands_1 = np.where(anchored[rows_1], labels[rows_2], labels[rows_1])
+        islands_2 = np.where(anchored[rows_2], labels[rows_1], labels[rows_2])
+        inside = islands_1 == islands_2
+        order = np.flatnonzero(inside)
+        order = order[np.argsort(islands_1[order], kind="stable")] #whole islands end up next to each other, pairs keep their order inside them
+        bridges = np.flatnonzero(~inside)
+        pair_count = len(order)
+
+        buffers["positions"][:count] = arrays.positions[:count]
+        buffers["radii"][:count] = arrays.radii[:count]
+        buffers["anchored"][:count] = anchored
+        buffers["resting"][:count] = arrays.sleeping[:count] | anchored
+        buffers["corrections"][:count] = 0
+        buffers["pairs"][:pair_count, 0] = rows_1[order]
+        buffers["pairs"][:pair_count, 1] = rows_2[order]
+        buffers["colliding"][:pair_count] = False
+
+        worst_penetration = 0.0
+        if pair_count:
+            #cut the pairs into runs of about the same size, only ever between two islands
+            island_starts = np.flatnonzero(np.diff(islands_1[order])) + 1
+            chunks = self.workers * self.chunks_per_worker
+            wanted = np.arange(1, chunks) * pair_count // chunks
+            cuts = island_starts[np.minimum(np.searchsorted(island_starts, wanted), len(island_starts) - 1)] if len(island_starts) else np.zeros(0, dtype=np.intp)
+            bounds = np.unique(np.concatenate(([0], cuts, [pair_count]))).tolist()
+            tasks = [(self.layout, start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+            worst_penetration = max(self.pool.map(solve_island_chunk, tasks, chunksize=1))
+
+        #bridges see the same starting positions as the islands did
+        indices, push_1, push_2, bridge_penetration = ball_pair_pushes(buffers["positions"], buffers["radii"], buffers["anchored"], buffers["resting"], rows_1[bridges], rows_2[bridges])
+        bridges = bridges[indices]
+        corrections = buffers["corrections"]
+        if len(bridges):
+            bridge_rows_1 = rows_1[bridges]
+            bridge_rows_2 = rows_2[bridges]
+            corrections[:count, 0] += np.bincount(bridge_rows_1, push_1[:, 0], count) - np.bincount(bridge_rows_2, push_2[:, 0], count)
+            corrections[:count, 1] += np.bincount(bridge_rows_1, push_1[:, 1], count) - np.bincount(bridge_rows_2, push_2[:, 1], count)
+        arrays.worst_penetration = max(arrays.worst_penetration, worst_penetration, bridge_penetration)
+
+        colliding = np.concatenate((order[buffers["colliding"][:pair_count]], bridges))
+        contact_rows_1 = rows_1[colliding]
+        contact_rows_2 = rows_2[colliding]
+        arrays.positions[:count] += corrections[:count] * contact_scales(contact_rows_1, contact_rows_2, count)[:, None] #counted over islands and bridges together, same as solve_ball_pairs
+        both_free = ~(anchored[contact_rows_1] | anchored[contact_rows_2])
+        self.contacts = (contact_rows_1[both_free], contact_rows_2[both_free])
+        return contact_rows_1, contact_rows_2
+
+
+
+class SpatialHash():
+    """Uniform grid broadphase, objects get bucketed into every cell their bounds touch so only nearby objects get paired."""
+
+    def __init__(self, cell_size:float = 100, max_cells:int = 256) -> None:
+        """A spatial hash that splits the world into square cells.
+
+        Args:
+            cell_size (float, optional): Width and height of a cell, somewhere around the size of the common objects works best. Defaults to 100.
+            max_cells (int, optional): Objects covering more cells than this (long walls, huge polygons) skip the grid and get checked against everything instead. Defaults to 256.
+        """        
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self.cells = {}
+        self.oversized = []
+
+
+    def find_pairs(self, objects:list[PhysicsObject]) -> list[tuple[int, int]]:
+        """Finds every pair of objects that share a cell.
+
+        Args:
+            objects (list[PhysicsObject]): Objects to pair up.
+
+        Returns:
+            list[tuple[int, int]]: Sorted (lower index, higher index) pairs into objects whose bounds might touch.
+        """        
+        self.cells = {}
+        self.oversized = []
+        cells = self.cells
+        inverse_size = 1 / self.cell_size
+        all_bounds = []
+
+        for index, object in enumerate(objects):
+            bounds = object.get_bounds()
+            all_bounds.append(bounds)
+
+            min_x = math.floor(bounds[0] * inverse_size)
+            min_y = math.floor(bounds[1] * inverse_size)
+            max_x = math.floor(bounds[2] * inverse_size)
+            max_y = math.floor(bounds[3] * inverse_size)
+
+            if (max_x - min_x + 1) * (max_y - min_y + 1) > self.max_cells:
+                self.oversized.append(index)
+                continue
+
+            for x in range(min_x, max_x + 1):
+                for y in range(min_y, max_y + 1):
+                    cell = cells.get((x, y))
+                    if cell is None:
+                        cells[(x, y)] = [index]
+                    else:
+                        cell.append(index)
+
+        pairs = set()
+        for cell in cells.values():
+            cell_length = len(cell)
+            for i in range(cell_length - 1):
+                index_1 = cell[i]
+                for j in range(i + 1, cell_length):
+                    pairs.add((index_1, cell[j])) #indices went in ascending so the pair is already ordered
+
+        for index_1 in self.oversized: #big stuff gets a plain box check against everything
+            bounds_1 = all_bounds[index_1]
+            for index_2, bounds_2 in enumerate(all_bounds):
+                if index_1 == index_2:
+                    continue
+                if bounds_1[0] > bounds_2[2] or bounds_2[0] > bounds_1[2] or bounds_1[1] > bounds_2[3] or bounds_2[1] > bounds_1[3]:
+                    continue
+                pairs.add((min(index_1, index_2), max(index_1, index_2)))
+
+        return sorted(pairs)
+
+
+
+class SweepAndPrune():
+    """Incremental sweep and prune broadphase, the endpoints stay sorted between calls so a calm scene barely needs any swaps."""
+
+    def __init__(self) -> None:
+        """Sweep and prune that keeps its sorted axes and overlapping pairs around between calls."""        
+        self.axes = ([], []) #endpoints of every object along x and y, each endpoint is [value, handle, is_max]
+        self.proxies = {} #handle: [object, min x endpoint, max x endpoint, min y endpoint, max y endpoint]
+        self.handles = {}
+        self.next_handle = 0
+        self.pairs = set()
+
+
+    def insert(self, object:PhysicsObject) -> None:
+        """Starts tracking an object, its endpoints get sorted into place on the next sort.
+
+        Args:
+            object (PhysicsObject): Object to track.
+        """        
+        handle = self.next_handle
+        self.next_handle += 1
+        self.handles[object] = handle
+
+        left, top, right, bottom = object.get_bounds()
+        proxy = [object, [left, handle, False], [right, handle, True], [top, handle, False], [bottom, handle, True]]
+        self.proxies[handle] = proxy
+
+        self.axes[0].append(proxy[1])
+        self.axes[0].append(proxy[2])
+        self.axes[1].append(proxy[3])
+        self.axes[1].append(proxy[4])
+
+
+    def remove(self, objects:list[PhysicsObject]) -> None:
+        """Stops tracking objects and forgets any pairs they were in.
+
+        Args:
+            objects (list[PhysicsObject]): Objects to stop tracking.
+        """        
+        removed = set()
+        for object in objects:
+            handle = self.handles.pop(object)
+            del self.proxies[handle]
+            removed.add(handle)
+
+        for axis in self.axes:
+            axis[:] = [endpoint for endpoint in axis if endpoint[1] not in removed]
+
+        self.pairs = {pair for pair in self.pairs if (pair[0] not in removed) and (pair[1] not in removed)}
+
+
+    def overlaps(self, handle_1:int, handle_2:int) -> bool:
+        """Checks if the boxes of two tracked objects overlap on both axes.
+
+        Args:
+            handle_1 (int): Handle of object one.
+            handle_2 (int): Handle of object two.
+
+        Returns:
+            bool: True or false of overlap.
+        """        
+        proxy_1 = self.proxies[handle_1]
+        proxy_2 = self.proxies[handle_2]
+        return (proxy_1[1][0] <= proxy_2[2][0]) and (proxy_2[1][0] <= proxy_1[2][0]) and (proxy_1[3][0] <= proxy_2[4][0]) and (proxy_2[3][0] <= proxy_1[4][0])
+
+
+    def sort_axis(self, axis:list[list]) -> None:
+        """Insertion sorts an axis, every swap between a min and a max endpoint starts or ends an overlap.
+
+        Args:
+            axis (list[list]): Endpoints of the axis.
+        """        
+        pairs = self.pairs
+
+        for i in range(1, len(axis)):
+            endpoint = axis[i]
+            value = endpoint[0]
+            j = i - 1
+            
+            while (j >= 0) and (axis[j][0] > value): #almost never runs when nothing moved much, that's the whole trick
+                other = axis[j]
+                
+                if endpoint[1] < other[1]:
+                    pair = (endpoint[1], other[1])
+                else:
+                    pair = (other[1], endpoint[1])
+
+                if (not endpoint[2]) and other[2]: #min went past a max, might be overlapping now
+                    if self.overlaps(endpoint[1], other[1]):
+                        pairs.add(pair)
+                
+                elif endpoint[2] and (not other[2]): #max went past a min, definitely apart now
+                    pairs.discard(pair)
+
+                axis[j + 1] = other
+                j -= 1
+            
+            axis[j + 1] = endpoint
+
+
+    def find_pairs(self, objects:list[PhysicsObject]) -> list[tuple[int, int]]:
+        """Updates the endpoints of every object and returns the pairs whose boxes overlap.
+
+        Args:
+            objects (list[PhysicsObject]): Objects to pair up, anything new gets tracked and anything missing gets dropped.
+
+        Returns:
+            list[tuple[int, int]]: Sorted (lower index, higher index) pairs into objects whose bounds might touch.
+        """        
+        handles = self.handles
+        present = set(objects)
+        missing = [object for object in handles if object not in present]
+        if missing:
+            self.remove(missing)
+        
+        for object in objects:
+            if object not in handles:
+                self.insert(object)
+
+        for proxy in self.proxies.values():
+            left, top, right, bottom = proxy[0].get_bounds()
+            proxy[1][0] = left
+            proxy[2][0] = right
+            proxy[3][0] = top
+            proxy[4][0] = bottom
+        
+        self.sort_axis(self.axes[0])
+        self.sort_axis(self.axes[1])
+
+        indices = {}
+        for index, object in enumerate(objects):
+            indices[handles[object]] = index
+
+        pairs = []
+        for handle_1, handle_2 in self.pairs:
+            index_1 = indices[handle_1]
+            index_2 = indices[handle_2]
+            if index_1 < index_2:
+                pairs.append((index_1, index_2))
+            else:
+                pairs.append((index_2, index_1))
+        
+        pairs.sort()
+        return pairs
+
+
+
+def union_bounds(bounds_1:list[float], bounds_2:list[float]) -> list[float]:
+    """Finds the box that fits around two boxes.
+
+    Args:
+        bounds_1 (list[float]): Left, top, right and bottom of box one.
+        bounds_2 (list[float]): Left, top, right and bottom of box two.
+
+    Returns:
+        list[float]: Left, top, right and bottom of the combined box.
+    """    
+    return [min(bounds_1[0], bounds_2[0]), min(bounds_1[1], bounds_2[1]), max(bounds_1[2], bounds_2[2]), max(bounds_1[3], bounds_2[3])]
+
+
+def perimeter(bounds:list[float]) -> float:
+    """Finds the perimeter of a box, the 2D version of surface area for tree costs.
+
+    Args:
+        bounds (list[float]): Left, top, right and bottom of the box.
+
+    Returns:
+        float: Perimeter of the box.
+    """    
+    return 2 * ((bounds[2] - bounds[0]) + (bounds[3] - bounds[1]))
+
+
+
+class TreeNode():
+    """A node of the DynamicTree, leaves hold an object and branches hold two children."""
+
+    def __init__(self, bounds:list[float], object:PhysicsObject = None) -> None:
+        """Tree node.
+
+        Args:
+            bounds (list[float]): Left, top, right and bottom of the node's box, fattened for leaves.
+            object (PhysicsObject, optional): Object of a leaf node. Defaults to None.
+        """        
+        self.bounds = bounds
+        self.object = object
+        self.parent = None
+        self.child_1 = None
+        self.child_2 = None
+        self.height = 0
+
+
+    def is_leaf(self) -> bool:
+        return self.child_1 is None
+
+
+
+class DynamicTree():
+    """Dynamic bounding volume tree broadphase, handles a big spread of object sizes and stays balanced for O(log n) inserts and removals."""
+
+    def __init__(self, margin:float = 10) -> None:
+        """A dynamic tree of fattened boxes, an object only gets reinserted once it leaves its fat box.
+
+        Args:
+            margin (float, optional): How far the boxes get fattened on every side. Defaults to 10.
+        """        
+        self.margin = margin
+        self.root = None
+        self.leaves = {}
+
+
+    def fatten(self, bounds:tuple[float, float, float, float]) -> list[float]:
+        return [bounds[0] - self.margin, bounds[1] - self.margin, bounds[2] + self.margin, bounds[3] + self.margin]
+
+
+    def insert(self, object:PhysicsObject) -> None:
+        """Adds an object to the tree.
+
+        Args:
+            object (PhysicsObject): Object to add.
+        """        
+        leaf = TreeNode(self.fatten(object.get_bounds()), object)
+        self.leaves[object] = leaf
+        self.insert_leaf(leaf)
+
+
+    def remove(self, object:PhysicsObject) -> None:
+        """Takes an object out of the tree.
+
+        Args:
+            object (PhysicsObject): Object to take out.
+        """        
+        self.remove_leaf(self.leaves.pop(object))
+
+
+    def update(self, object:PhysicsObject) -> bool:
+        """Moves an object's leaf if the object left its fat box.
+
+        Args:
+            object (PhysicsObject): Object to update.
+
+        Returns:
+            bool: If the leaf had to be reinserted.
+        """        
+        leaf = self.leaves[object]
+        bounds = object.get_bounds()
+        fat_bounds = leaf.bounds
+
+        if (fat_bounds[0] <= bounds[0]) and (fat_bounds[1] <= bounds[1]) and (bounds[2] <= fat_bounds[2]) and (bounds[3] <= fat_bounds[3]):
+            return False
+
+        self.remove_leaf(leaf)
+        leaf.bounds = self.fatten(bounds)
+        self.insert_leaf(leaf)
+        return True
+
+
+    def sync(self, objects:list[PhysicsObject]) -> None:
+        """Adds new objects, removes missing ones and updates the rest.
+
+        Args:
+            objects (list[PhysicsObject]): Every object that should be in the tree.
+        """        
+        leaves = self.leaves
+        present = set(objects)
+        for object in [object for object in leaves if object not in present]:
+            self.remove(object)
+
+        for object in objects:
+            if object in leaves:
+                self.update(object)
+            else:
+                self.insert(object)
+
+
+    def insert_leaf(self, leaf:TreeNode) -> None:
+        if self.root is None:
+            self.root = leaf
+            leaf.parent = None
+            return
+
+        #walk down to the cheapest sibling, cost is how much perimeter the tree grows by
+        leaf_bounds = leaf.bounds
+        node = self.root
+        while not node.is_leaf():
+            area = perimeter(node.bounds)
+            combined_area = perimeter(union_bounds(node.bounds, leaf_bounds))
+
+            cost = 2 * combined_area
+            inheritance_cost = 2 * (combined_area - area)
+
+            cost_1 = perimeter(union_bounds(leaf_bounds, node.child_1.bounds)) + inheritance_cost
+            if not node.child_1.is_leaf():
+                cost_1 -= perimeter(node.child_1.bounds)
+            
+            cost_2 = perimeter(union_bounds(leaf_bounds, node.child_2.bounds)) + inheritance_cost
+            if not node.child_2.is_leaf():
+                cost_2 -= perimeter(node.child_2.bounds)
+
+            if (cost < cost_1) and (cost < cost_2):
+                break
+
+            if cost_1 < cost_2:
+                node = node.child_1
+            else:
+                node = node.child_2
+
+        sibling = node
+        old_parent = sibling.parent
+        new_parent = TreeNode(union_bounds(leaf_bounds, sibling.bounds))
+        new_parent.parent = old_parent
+        new_parent.height = sibling.height + 1
+
+        if old_parent is None:
+            self.root = new_parent
+        elif old_parent.child_1 is sibling:
+            old_parent.child_1 = new_parent
+        else:
+            old_parent.child_2 = new_parent
+
+        new_parent.child_1 = sibling
+        new_parent.child_2 = leaf
+        sibling.parent = new_parent
+        leaf.parent = new_parent
+
+        self.refit(leaf.parent)
+
+
+    def remove_leaf(self, leaf:TreeNode) -> None:
+        if leaf is self.root:
+            self.root = None
+            return
+
+        parent = leaf.parent
+        grandparent = parent.parent
+        if parent.child_1 is leaf:
+            sibling = parent.child_2
+        else:
+            sibling = parent.child_1
+
+        if grandparent is None:
+            self.root = sibling
+            sibling.parent = None
+        else:
+            if grandparent.child_1 is parent:
+                grandparent.child_1 = sibling
+            else:
+                grandparent.child_2 = sibling
+            sibling.parent = grandparent
+            self.refit(grandparent)
+        
+        leaf.parent = None
+
+
+    def refit(self, node:TreeNode) -> None:
+        """Walks up from a node rebalancing and refitting the boxes and heights."""        
+        while node is not None:
+            node = self.balance(node)
+            node.height = 1 + max(node.child_1.height, node.child_2.height)
+            node.bounds = union_bounds(node.child_1.bounds, node.child_2.bounds)
+            node = node.parent
+
+
+    def balance(self, node_a:TreeNode) -> TreeNode:
+        """Rotates the taller child up if the node's children are uneven, like an AVL tree.
+
+        Args:
+            node_a (TreeNode): Node to balance.
+
+        Returns:
+            TreeNode: The node now sitting where node_a used to be.
+        """        
+        if node_a.is_leaf() or (node_a.height < 2):
+            return node_a
+
+        node_b = node_a.child_1
+        node_c = node_a.child_2
+        balance = node_c.height - node_b.height
+
+        if balance > 1: #rotate c up
+            node_f = node_c.child_1
+            node_g = node_c.child_2
+
+            node_c.child_1 = node_a
+            node_c.parent = node_a.parent
+            node_a.parent = node_c
+            self.replace_child(node_c.parent, node_a, node_c)
+
+            if node_f.height > node_g.height:
+                node_c.child_2 = node_f
+                node_a.child_2 = node_g
+                node_g.parent = node_a
+                node_a.bounds = union_bounds(node_b.bounds, node_g.bounds)
+                node_c.bounds = union_bounds(node_a.bounds, node_f.bounds)
+                node_a.height = 1 + max(node_b.height, node_g.height)
+                node_c.height = 1 + max(node_a.height, node_f.height)
+            else:
+                node_c.child_2 = node_g
+                node_a.child_2 = node_f
+                node_f.parent = node_a
+                node_a.bounds = union_bounds(node_b.bounds, node_f.bounds)
+                node_c.bounds = union_bounds(node_a.bounds, node_g.bounds)
+                node_a.height = 1 + max(node_b.height, node_f.height)
+                node_c.height = 1 + max(node_a.height, node_g.height)
+            
+            return node_c
+
+        if balance < -1: #rotate b up
+            node_d = node_b.child_1
+            node_e = node_b.child_2
+
+            node_b.child_1 = node_a
+            node_b.parent = node_a.parent
+            node_a.parent = node_b
+            self.replace_child(node_b.parent, node_a, node_b)
+
+            if node_d.height > node_e.height:
+                node_b.child_2 = node_d
+                node_a.child_1 = node_e
+                node_e.parent = node_a
+                node_a.bounds = union_bounds(node_c.bounds, node_e.bounds)
+                node_b.bounds = union_bounds(node_a.bounds, node_d.bounds)
+                node_a.height = 1 + max(node_c.height, node_e.height)
+                node_b.height = 1 + max(node_a.height, node_d.height)
+            else:
+                node_b.child_2 = node_e
+                node_a.child_1 = node_d
+                node_d.parent = node_a
+                node_a.bounds = union_bounds(node_c.bounds, node_d.bounds)
+                node_b.bounds = union_bounds(node_a.bounds, node_e.bounds)
+                node_a.height = 1 + max(node_c.height, node_d.height)
+                node_b.height = 1 + max(node_a.height, node_e.height)
+
+            return node_b
+
+        return node_a
+
+
+    def replace_child(self, parent:TreeNode, old_child:TreeNode, new_child:TreeNode) -> None:
+        if parent is None:
+            self.root = new_child
+        elif parent.child_1 is old_child:
+            parent.child_1 = new_child
+        else:
+            parent.child_2 = new_child
+
+
+    def query(self, bounds:list[float]) -> list[PhysicsObject]:
+        """Finds every object whose fat box overlaps a region.
+
+        Args:
+            bounds (list[float]): Left, top, right and bottom of the region.
+
+        Returns:
+            list[PhysicsObject]: Objects that might be in the region.
+        """        
+        found = []
+        if self.root is None:
+            return found
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            node_bounds = node.bounds
+            if (node_bounds[0] > bounds[2]) or (bounds[0] > node_bounds[2]) or (node_bounds[1] > bounds[3]) or (bounds[1] > node_bounds[3]):
+                continue
+
+            if node.child_1 is None:
+                found.append(node.object)
+            else:
+                stack.append(node.child_1)
+                stack.append(node.child_2)
+        
+        return found
+
+
+    def find_pairs(self, objects:list[PhysicsObject]) -> list[tuple[int, int]]:
+        """Syncs the tree with the objects and queries every leaf against it.
+
+        Args:
+            objects (list[PhysicsObject]): Objects to pair up.
+
+        Returns:
+            list[tuple[int, int]]: Sorted (lower index, higher index) pairs into objects whose fat boxes overlap.
+        """        
+        self.sync(objects)
+
+        indices = {}
+        for index, object in enumerate(objects):
+            indices[object] = index
+
+        pairs = []
+        for index_1, object in enumerate(objects):
+            for other in self.query(self.leaves[object].bounds):
+                index_2 = indices[other]
+                if index_2 > index_1: #each pair gets found from both sides, only keep one
+                    pairs.append((index_1, index_2))
         
+        pairs.sort()
+        return pairs
+
 
 
 class Solver():
     """The brain behind the physics engine."""
 
-    def __init__(self, grav_objects:list[PhysicsObject], no_grav_objects:list[PhysicsObject], subsets:int = 8, gravity:float = 1000) -> None:
+    collision_handlers = {} #(type, type): (handler, flipped, analytics key), fill with register_collision_handler()
+
+    def __init__(self, grav_objects:list[PhysicsObject], no_grav_objects:list[PhysicsObject], subsets:int = 8, gravity:float = 1000, broadphase:str = "brute_force", cell_size:float = 100, fat_margin:float = 10, backend:str = "objects", profiler:Profiler = None, sleep_time:float = None, sleep_threshold:float = 0.05, sat_max_points:int = 8, min_subsets:int = None, max_subsets:int = None, workers:int = 0) -> None:
         """Here we go
 
         Args:
@@ -324,23 +1728,73 @@ class Solver():
             no_grav_objects (list[PhysicsObject]): A list of physics objects that have collisions
             subsets (int, optional): The amount of subsets that the Solver will go over in an update() cycle. Defaults to 8.
             gravity (float, optional): Strength of the gravity, default is similiar to Earth. Defaults to 1000.
+            broadphase (str, optional): How collision pairs between moving objects are found, "brute_force" checks every pair, "spatial_hash" only checks objects sharing a grid cell, "sweep_and_prune" keeps sorted bounds between updates and "dynamic_tree" keeps a tree of fattened boxes. With a broadphase, anchored objects go in their own static index instead, brute force checks them against every moving object. Anchored objects never get paired with each other. Defaults to "brute_force".
+            cell_size (float, optional): Cell size of the "spatial_hash" broadphase. Defaults to 100.
+            fat_margin (float, optional): How much the "dynamic_tree" broadphase fattens boxes by. Defaults to 10.
+            backend (str, optional): "objects" updates every object on its own, "arrays" keeps Balls in NumPy arrays (needs numpy) and updates them all at once. Defaults to "objects".
+            profiler (Profiler, optional): Where to record phase and pair type timings, None skips timing altogether. Defaults to None.
+            sleep_time (float, optional): How long a group of touching objects has to stay still before it falls asleep and gets skipped, None turns sleeping off. Defaults to None.
+            sleep_threshold (float, optional): How far an object can move in a subset and still count as still, settled piles drift about 0.01 to 0.03 a subset with either backend. Defaults to 0.05.
+            sat_max_points (int, optional): Polygon pairs where both have at most this many points go through SAT instead of GJK/EPA, 0 sends every pair through GJK/EPA. Defaults to 8.
+            min_subsets (int, optional): Fewest subsets adaptive substepping can go down to, setting this and max_subsets picks the amount of subsets every update() from how fast things move and how deep they overlap, starting from subsets. Defaults to None (always use subsets).
+            max_subsets (int, optional): Most subsets adaptive substepping can go up to. Defaults to None.
+            workers (int, optional): Worker processes that solve islands of touching Balls at the same time, needs the "arrays" backend. Results come out the same for any amount of workers from 1 up, 0 solves the pairs in one go and can differ in the last bits, call close() when done. Defaults to 0 (solve everything in this process).
         """        
         self.gravity = gravity
         self.grav_objects = grav_objects
         self.no_grav_objects = no_grav_objects #we need to save as much perf as possible
         self.all_objects = self.grav_objects + self.no_grav_objects
         self.subsets = subsets
+
+        if broadphase == "brute_force":
+            self.broadphase = None
+        elif broadphase == "spatial_hash":
+            self.broadphase = SpatialHash(cell_size)
+        elif broadphase == "sweep_and_prune":
+            self.broadphase = SweepAndPrune()
+        elif broadphase == "dynamic_tree":
+            self.broadphase = DynamicTree(fat_margin)
+        else:
+            raise ValueError(f"Unknown broadphase [{broadphase}]")
+
+        if backend == "objects":
+            self.ball_arrays = None
+        elif backend == "arrays":
+            self.ball_arrays = BallArrays()
+        else:
+            raise ValueError(f"Unknown backend [{backend}]")
+        self.sync_arrays()
+
+        if not workers:
+            self.island_pool = None
+        elif self.ball_arrays is not None:
+            self.island_pool = IslandPool(self.ball_arrays, workers)
+        else:
+            raise ValueError("workers needs the \"arrays\" backend")
+
+        self.static_index = DynamicTree(0) #anchored objects, leaves only get moved when the objects do
+        self.sync_static()
         
         self.time_elapsed = 0
+        self.profiler = profiler #phases get recorded as "Collisions", "Position_Updates" and the pair type analytics keys
 
-        self.performance_analytics = {
-            "Collisions":[],
-            "Position_Updates":[],
-            # "Update":[],
-            "GJK/EPA":[],
-            "Line/Ball":[],
-            "Ball/Ball":[]
-        }
+        self.sleep_time = sleep_time
+        self.sleep_threshold = sleep_threshold
+        self.contacts = [] #pairs of non-anchored objects that touched in the last subset, islands get built from these
+        self.ball_contacts = None #same for the "arrays" backend, rows of touching Balls
+
+        if (min_subsets is None) != (max_subsets is None):
+            raise ValueError("min_subsets and max_subsets have to be set together")
+        self.min_subsets = min_subsets
+        self.max_subsets = max_subsets
+        self.displacement_limit = 0.25 #most an object should move in a subset, as a fraction of the smallest radius
+        self.penetration_limit = 0.05 #deepest overlap to put up with, as a fraction of the smallest radius
+        self.worst_penetration = 0.0 #deepest overlap seen since the start of the last update()
+
+        self.gjk_cache = {} #(id, id) of a pair to its last gjk() direction and simplex, see gjk()
+        self.last_gjk_cache = {}
+        self.sat_max_points = sat_max_points
+        self.update_hooks = [] #called with the Solver at the end of every update(), recorders and renderers hang off here
 
 
     
@@ -351,37 +1805,220 @@ class Solver():
             delta_time (float): The amount of time passed since last call.
         """        
         self.time_elapsed += delta_time
-        subset_delta_time = delta_time/self.subsets #we need to distribute time accordingly so that time isn't screwed up
         
         self.all_objects = self.grav_objects + self.no_grav_objects #we need to constantly update this to account for all sorts of changes
+        self.sync_arrays()
+        self.sync_static()
+
+        if self.max_subsets is not None:
+            self.subsets = self.pick_subsets()
+        self.worst_penetration = 0.0
+        if self.ball_arrays is not None:
+            self.ball_arrays.worst_penetration = 0.0
+        subset_delta_time = delta_time/self.subsets #we need to distribute time accordingly so that time isn't screwed up
+
+        profiler = self.profiler
+        sleeping = self.sleep_time is not None
+        if sleeping:
+            self.wake_moved()
 
         for subset in range(self.subsets): #surely there's a better way?
+            if sleeping: #only the last subset's contacts are kept
+                self.contacts = []
+                self.ball_contacts = None
+
             self.apply_gravity(self.gravity)
-            # start = perf_counter()
+
+            if profiler is None:
+                self.solve_collisions()
+                self.update_positions(subset_delta_time)
+                continue
+
             collision = perf_counter()
             self.solve_collisions()
-            try:
-                self.performance_analytics["Collisions"].insert(0, (perf_counter()-collision)*1000)
-                self.performance_analytics["Collisions"].pop(16)
-            except IndexError:
-                self.performance_analytics["Collisions"].insert(0, (perf_counter()-collision)*1000)
-            
             update_positions = perf_counter()
             self.update_positions(subset_delta_time)
-            try:
-                self.performance_analytics["Position_Updates"].insert(0, (perf_counter()-update_positions)*1000)
-                self.performance_analytics["Position_Updates"].pop(16)
-            except IndexError:
-                self.performance_analytics["Position_Updates"].insert(0, (perf_counter()-update_positions)*1000)
+            profiler.record("Collisions", (update_positions-collision)*1000)
+            profiler.record("Position_Updates", (perf_counter()-update_positions)*1000)
+
+        if sleeping:
+            self.update_sleeping(delta_time)
+
+        for hook in self.update_hooks:
+            hook(self)
+
+    
+    def pick_subsets(self) -> int:
+        """Works out how many subsets the next update() needs, sets of objects that are fast or sinking into each other get more and calm ones get fewer.
+        Looks at the biggest subset displacement and the deepest overlap of the last update(), both relative to the smallest moving object.
+
+        Returns:
+            int: Amount of subsets, between min_subsets and max_subsets.
+        """        
+        smallest_radius = math.inf
+        largest_displacement = 0.0 #squared until the end
+
+        arrays = self.ball_arrays
+        if (arrays is not None) and arrays.count:
+            moving = ~arrays.anchored[:arrays.count]
+            if moving.any():
+                smallest_radius = arrays.radii[:arrays.count][moving].min()
+                displacement = arrays.positions[:arrays.count] - arrays.last_positions[:arrays.count]
+                largest_displacement = np.einsum("ij,ij->i", displacement, displacement).max()
+
+        for object in self.loose_objects:
+            if object.anchored:
+                continue
+            if object.radius < smallest_radius:
+                smallest_radius = object.radius
+            displacement = (object.position - object.last_position).length_squared()
+            if displacement > largest_displacement:
+                largest_displacement = displacement
+
+        if smallest_radius == math.inf: #nothing can move
+            return self.min_subsets
+        smallest_radius = max(float(smallest_radius), MIN_SUBSET_RADIUS) #points and radius 0 balls would divide by zero
+
+        worst_penetration = self.worst_penetration
+        if arrays is not None:
+            worst_penetration = max(worst_penetration, arrays.worst_penetration)
+
+        frame_displacement = math.sqrt(largest_displacement) * self.subsets #last_position is only one subset back
+        subsets = math.ceil(frame_displacement / (self.displacement_limit * smallest_radius))
+        if worst_penetration > self.penetration_limit * smallest_radius: #still overlapping too much, split the time up finer
+            subsets = max(subsets, math.ceil(self.subsets * worst_penetration / (self.penetration_limit * smallest_radius)))
+
+        subsets = max(subsets, self.subsets - 1) #only come down one at a time so it doesn't flip flop
+        return int(min(max(subsets, self.min_subsets), self.max_subsets))
+
+
+    def close(self) -> None:
+        """Stops the island workers, only needed when the Solver was made with workers."""        
+        if self.island_pool is not None:
+            self.island_pool.close()
+            self.island_pool = None
+
+
+    def attach_surface(self, surface:pygame.Surface) -> None:
+        """Attaches a surface to every object in the Solver object, for rendering a world that was built headless.
+
+        Args:
+            surface (pygame.Surface): Surface to draw onto.
+        """        
+        for object in self.grav_objects + self.no_grav_objects:
+            object.attach_surface(surface)
+
+
+    def query_region(self, bounds:list[float]) -> list[PhysicsObject]:
+        """Finds every object whose bounds overlap a region, uses the static index and the "dynamic_tree" broadphase when there is one.
+
+        Args:
+            bounds (list[float]): Left, top, right and bottom of the region.
+
+        Returns:
+            list[PhysicsObject]: Objects in the region.
+        """        
+        self.sync_static()
+        dynamic_objects = [self.all_objects[index] for index in self.dynamic_indices]
+        if isinstance(self.broadphase, DynamicTree):
+            self.broadphase.sync(dynamic_objects)
+            candidates = self.broadphase.query(bounds)
+        else:
+            candidates = dynamic_objects
+        candidates += self.static_index.query(bounds)
+        
+        found = []
+        for object in candidates:
+            object_bounds = object.get_bounds()
+            if (object_bounds[0] > bounds[2]) or (bounds[0] > object_bounds[2]) or (object_bounds[1] > bounds[3]) or (bounds[1] > object_bounds[3]):
+                continue
+            found.append(object)
+        
+        return found
 
     
+    def sync_arrays(self) -> None:
+        """Attaches and detaches Balls from the "arrays" backend and works out which objects still update on their own."""        
+        if self.ball_arrays is None:
+            self.loose_grav_objects = self.grav_objects
+            self.loose_objects = self.all_objects
+            return
+
+        self.ball_arrays.sync(self.grav_objects, self.no_grav_objects)
+        self.loose_grav_objects = [object for object in self.grav_objects if object.arrays is None]
+        self.loose_objects = [object for object in self.all_objects if object.arrays is None]
+        self.object_rows = np.array([-1 if object.arrays is None else object.row for object in self.all_objects], dtype=np.intp) #row of every object in all_objects, -1 if it has none
+
+        self.batched_lines = []
+        line_slots = []
+        for object in self.all_objects:
+            if type(object) == Line:
+                line_slots.append(len(self.batched_lines))
+                self.batched_lines.append(object)
+            else:
+                line_slots.append(-1)
+        self.object_line_slots = np.array(line_slots, dtype=np.intp) #same idea for Lines, their index in batched_lines
+
+
+    def sync_static(self) -> None:
+        """Splits all_objects into anchored (static) and moving (dynamic) objects and brings the static index up to date.
+        Anchored objects can't be pushed, so two of them never need to be paired up."""        
+        self.static_indices = {} #static object to its index in all_objects
+        self.dynamic_indices = []
+        static_objects = []
+        for index, object in enumerate(self.all_objects):
+            if object.anchored:
+                self.static_indices[object] = index
+                static_objects.append(object)
+            else:
+                self.dynamic_indices.append(index)
+        
+        self.static_index.sync(static_objects) #only touches the tree if an anchored object got added, removed or moved
+
+
+    def find_pairs(self) -> list[tuple[int, int]]:
+        """Finds every pair of objects that might be touching, dynamic objects get paired with each other through the broadphase and with static objects through the static index.
+
+        Returns:
+            list[tuple[int, int]]: Sorted (lower index, higher index) pairs into all_objects.
+        """        
+        objects = self.all_objects
+        dynamic_indices = self.dynamic_indices
+        dynamic_objects = [objects[index] for index in dynamic_indices]
+
+        if self.broadphase is None:
+            pairs = [(index_1, index_2) for dynamic_index, index_1 in enumerate(dynamic_indices) for index_2 in dynamic_indices[dynamic_index + 1:]]
+        else:
+            pairs = [(dynamic_indices[index_1], dynamic_indices[index_2]) for index_1, index_2 in self.broadphase.find_pairs(dynamic_objects)]
+
+        if self.static_indices and self.broadphase is None: #brute force stays a plain O(n²) baseline, every dynamic object against every static one
+            static_index_list = sorted(self.static_indices.values())
+            pairs += [(index, static_index) if index < static_index else (static_index, index) for index in dynamic_indices for static_index in static_index_list]
+            pairs.sort()
+        elif self.static_indices:
+            static_indices = self.static_indices
+            query = self.static_index.query
+            for index, object in zip(dynamic_indices, dynamic_objects):
+                for static_object in query(object.get_bounds()):
+                    static_index = static_indices[static_object]
+                    pairs.append((index, static_index) if index < static_index else (static_index, index))
+            pairs.sort() #same order as pairing everything up, so results don't change
+        
+        return pairs
+
+
     def update_positions(self, delta_time:float) -> None:
         """Updates the positions of all objects in the Solver object.
 
         Args:
             delta_time (float): The amount of time passed since last update.
         """        
-        for object in self.all_objects:
+        if self.ball_arrays is not None:
+            self.ball_arrays.update_positions(delta_time)
+
+        for object in self.loose_objects:
+            if object.sleeping:
+                continue
             object.update_position(delta_time)
 
 
@@ -392,90 +2029,343 @@ class Solver():
             gravity (_type_): The amount of gravity to apply.
         """        
         """Applies the gravity to all specified gravity objects."""
-        for object in self.grav_objects:
+        if self.ball_arrays is not None:
+            self.ball_arrays.apply_gravity(gravity)
+
+        for object in self.loose_grav_objects:
+            if object.sleeping:
+                continue
             object.accelerate(Vector2(0, gravity))
 
 
     def solve_collisions(self) -> None:
-        """Solves the collisions between all objects stored in the Solver object.
+        """Solves the collisions between all objects stored in the Solver object, every pair only gets visited once.
         """        
-        for object_1 in self.all_objects:
-            object_1_type = type(object_1)
+        objects = self.all_objects
+        self.last_gjk_cache, self.gjk_cache = self.gjk_cache, {} #pairs that don't come back this subset get dropped
 
-            for object_2 in self.all_objects: #NEEDS BETTER ALGO. THE CONSTANT LOOP + A LOT OF IFS IS PERFORMANCE HEAVY
-                
-                
-                if object_1 == object_2:
-                    continue
-                
-                
-                
-                if (object_1.radius + object_2.radius) < Vector2(object_2.position - object_1.position).length():
-                    continue
-                
-                object_2_type = type(object_2)
-
-                if (object_1_type == Ball) and (object_2_type == Ball):
-                    ball_ball = perf_counter()
-                    self.ball_on_ball(object_1, object_2)
-                    
-                    try:
-                        self.performance_analytics["Ball/Ball"].insert(0, (perf_counter()-ball_ball)*1000)
-                        self.performance_analytics["Ball/Ball"].pop(16)
-                    except IndexError:
-                        self.performance_analytics["Ball/Ball"].insert(0, (perf_counter()-ball_ball)*1000)
-                        
-                    continue
-                
+        if self.ball_arrays is not None:
+            self.solve_collisions_batched()
+            return
 
-                elif ((object_1_type == Line) and (object_2_type == Ball)):
-                    line_ball = perf_counter()
-                    self.line_on_ball(object_1, object_2)
-                    
-                    try:
-                        self.performance_analytics["Line/Ball"].insert(0, (perf_counter()-line_ball)*1000)
-                        self.performance_analytics["Line/Ball"].pop(16)
-                    except IndexError:
-                        self.performance_analytics["Line/Ball"].insert(0, (perf_counter()-line_ball)*1000)
-                        
-                    continue
-                    
-
-                elif ((object_1_type == Ball) and (object_2_type == Line)):
-                    line_ball = perf_counter()
-                    self.line_on_ball(object_2, object_1)
-                    
-                    try:
-                        self.performance_analytics["Line/Ball"].insert(0, (perf_counter()-line_ball)*1000)
-                        self.performance_analytics["Line/Ball"].pop(16)
-                    except IndexError:
-                        self.performance_analytics["Line/Ball"].insert(0, (perf_counter()-line_ball)*1000)
-                    
-                    continue    
-                    
-
-                elif (object_1_type == Polygon) or (object_2_type == Polygon):
-                    gjk_epa = perf_counter()
-                    if self.gjk(object_1, object_2):
-                        # object_1.surface.fill((255, 0, 0))
-                        normal = self.EPA(self.simplex, object_1, object_2)/2
-                        try:
-                            normal = normal.normalize()
-                        except ValueError:
-                            pass
-                        
-                        object_1.position -= normal * 0.05 * (not object_1.anchored)
-                        object_2.position += normal * 0.05 * (not object_2.anchored)
-                        
-                    try:
-                        self.performance_analytics["GJK/EPA"].insert(0, (perf_counter()-gjk_epa)*1000)
-                        self.performance_analytics["GJK/EPA"].pop(16)
-                    except IndexError:
-                        self.performance_analytics["GJK/EPA"].insert(0, (perf_counter()-gjk_epa)*1000)
-                        
-                    continue
+        for index_1, index_2 in self.find_pairs():
+            self.collide(objects[index_1], objects[index_2])
+
+
+    def solve_collisions_batched(self) -> None:
+        """Solves collisions for the "arrays" backend, Ball/Ball and Line/Ball pairs go through batched solves and the rest go through collide()."""        
+        objects = self.all_objects
+        arrays = self.ball_arrays
+        lines = self.batched_lines
+
+        if self.broadphase is None:
+            ball_rows_1, ball_rows_2 = arrays.touching_pairs() #pairs that can't touch never get a push, so leaving them out changes nothing
+            line_indices = np.repeat(np.arange(len(lines), dtype=np.intp), arrays.count)
+            line_rows = np.tile(np.arange(arrays.count, dtype=np.intp), len(lines))
+            
+            other_pairs = []
+            loose_objects = self.loose_objects
+            for loose_index, object_1 in enumerate(loose_objects):
+                for object_2 in loose_objects[loose_index + 1:]:
+                    if not (object_1.anchored and object_2.anchored):
+                        other_pairs.append((object_1, object_2))
+                if type(object_1) != Line:
+                    for ball in arrays.balls:
+                        if not (object_1.anchored and ball.anchored):
+                            other_pairs.append((object_1, ball))
+        
+        else:
+            pairs = np.array(self.find_pairs(), dtype=np.intp).reshape(-1, 2)
+            pair_rows = self.object_rows[pairs]
+            pair_lines = self.object_line_slots[pairs]
+            
+            ball_ball = (pair_rows[:, 0] >= 0) & (pair_rows[:, 1] >= 0)
+            line_ball = (pair_lines[:, 0] >= 0) & (pair_rows[:, 1] >= 0)
+            ball_line = (pair_rows[:, 0] >= 0) & (pair_lines[:, 1] >= 0)
+
+            ball_rows_1 = pair_rows[ball_ball, 0]
+            ball_rows_2 = pair_rows[ball_ball, 1]
+            line_indices = np.concatenate((pair_lines[line_ball, 0], pair_lines[ball_line, 1]))
+            line_rows = np.concatenate((pair_rows[line_ball, 1], pair_rows[ball_line, 0]))
+            
+            other_pairs = [(objects[index_1], objects[index_2]) for index_1, index_2 in pairs[~(ball_ball | line_ball | ball_line)].tolist()]
+
+        resting = arrays.sleeping | arrays.anchored #before the solves, a ball that gets woken up still counts as resting this subset
+
+        solve_ball_pairs = arrays.solve_ball_pairs if self.island_pool is None else self.island_pool.solve
+        if self.profiler is None:
+            ball_contacts = solve_ball_pairs(ball_rows_1, ball_rows_2)
+            line_contacts = arrays.solve_line_pairs(lines, line_indices, line_rows)
+        else:
+            ball_ball = perf_counter()
+            ball_contacts = solve_ball_pairs(ball_rows_1, ball_rows_2)
+            line_ball = perf_counter()
+            line_contacts = arrays.solve_line_pairs(lines, line_indices, line_rows)
+            self.profiler.record("Ball/Ball", (line_ball-ball_ball)*1000)
+            self.profiler.record("Line/Ball", (perf_counter()-line_ball)*1000)
+
+        if self.sleep_time is not None:
+            self.touch_batched(resting, ball_contacts, line_contacts)
+
+        for object_1, object_2 in other_pairs:
+            self.collide(object_1, object_2)
+
+
+    @classmethod
+    def register_collision_handler(cls, type_1:type, type_2:type, handler, analytics_key:str = None) -> None:
+        """Registers the function that resolves collisions between two shape types, lets new shapes plug in without touching solve_collisions.
+
+        Args:
+            type_1 (type): First shape type, the handler gets an object of this type first.
+            type_2 (type): Second shape type.
+            handler (Callable[[Solver, PhysicsObject, PhysicsObject], bool]): Detects and resolves the collision, called with the Solver and both objects.
+            analytics_key (str, optional): Name to time the handler under in the Solver's profiler. Defaults to None (untimed).
+        """        
+        cls.collision_handlers[(type_1, type_2)] = (handler, False, analytics_key)
+        if type_1 != type_2:
+            cls.collision_handlers[(type_2, type_1)] = (handler, True, analytics_key) #flipped so the handler always gets its arguments in order
+
+
+    def collide(self, object_1:PhysicsObject, object_2:PhysicsObject) -> None:
+        """Detects and resolves a collision between two objects with the registered collision handler.
+
+        Args:
+            object_1 (PhysicsObject): Object one of collision.
+            object_2 (PhysicsObject): Object two of collision.
+        """        
+        entry = self.collision_handlers.get((type(object_1), type(object_2)))
+        if entry is None:
+            return
+
+        if (object_1.radius + object_2.radius) < Vector2(object_2.position - object_1.position).length():
+            return
+
+        handler, flipped, analytics_key = entry
+        if flipped:
+            object_1, object_2 = object_2, object_1
+
+        sleeping = (self.sleep_time is not None) and (object_1.sleeping or object_2.sleeping)
+        if sleeping and self.at_rest(object_1) and self.at_rest(object_2):
+            return
+
+        if (analytics_key is None) or (self.profiler is None):
+            collided = handler(self, object_1, object_2)
+        else:
+            handler_start = perf_counter()
+            collided = handler(self, object_1, object_2)
+            self.profiler.record(analytics_key, (perf_counter()-handler_start)*1000)
+
+        if collided and (self.sleep_time is not None):
+            self.touch(object_1, object_2)
+
+
+    def can_sleep(self, object:PhysicsObject) -> bool:
+        """Anchored objects never sleep, they're already skipped wherever it matters and motors keep moving."""        
+        return not object.anchored
+
+
+    def at_rest(self, object:PhysicsObject) -> bool:
+        """Checks if an object can't push anything around, sleeping or anchored without a motor."""        
+        return object.sleeping or (object.anchored and getattr(object, "motor", 0) == 0)
+
+
+    def sleep(self, island:list[PhysicsObject]) -> None:
+        """Puts a group of touching objects to sleep, they lose their velocity and wake up together.
+
+        Args:
+            island (list[PhysicsObject]): Objects to put to sleep.
+        """        
+        for object in island:
+            object.sleeping = True
+            object.island = island
+            object.sleep_position = Vector2(object.position)
+            object.last_position = Vector2(object.position)
+            object.acceleration = Vector2(0, 0)
+            if object.arrays is not None:
+                object.arrays.sleeping[object.row] = True
+
+
+    def wake(self, object:PhysicsObject) -> None:
+        """Wakes an object up along with everything that fell asleep with it.
+
+        Args:
+            object (PhysicsObject): Object to wake.
+        """        
+        island = object.island if object.island is not None else [object]
+        for member in island:
+            member.sleeping = False
+            member.sleep_timer = 0
+            member.sleep_position = None
+            member.island = None
+            if member.arrays is not None:
+                member.arrays.sleeping[member.row] = False
+
+
+    def wake_moved(self) -> None:
+        """Wakes sleeping objects that got moved from outside the Solver, like being dragged around."""        
+        threshold = self.sleep_threshold * self.sleep_threshold
+        for object in self.all_objects:
+            if object.sleeping and (object.position - object.sleep_position).length_squared() > threshold:
+                self.wake(object)
+
+
+    def touch(self, object_1:PhysicsObject, object_2:PhysicsObject) -> None:
+        """Wakes a sleeping object that got hit by something moving and remembers the contact for islands.
+
+        Args:
+            object_1 (PhysicsObject): Object one of collision.
+            object_2 (PhysicsObject): Object two of collision.
+        """        
+        if object_1.sleeping and not self.at_rest(object_2):
+            self.wake(object_1)
+        elif object_2.sleeping and not self.at_rest(object_1):
+            self.wake(object_2)
+
+        if not (object_1.anchored or object_2.anchored):
+            self.contacts.append((object_1, object_2))
+
+
+    def touch_batched(self, resting:"np.ndarray", ball_contacts:tuple["np.ndarray", "np.ndarray"], line_contacts:tuple["np.ndarray", "np.ndarray"]) -> None:
+        """touch() for the pairs that went through the batched solves.
+
+        Args:
+            resting (np.ndarray): Which rows were sleeping or anchored going into the solves.
+            ball_contacts (tuple[np.ndarray, np.ndarray]): Rows of the colliding Ball/Ball pairs.
+            line_contacts (tuple[np.ndarray, np.ndarray]): Line indices and rows of the colliding Line/Ball pairs.
+        """        
+        arrays = self.ball_arrays
+        rows_1, rows_2 = ball_contacts
+        
+        woken_rows = np.concatenate((rows_1[arrays.sleeping[rows_1] & ~resting[rows_2]], rows_2[arrays.sleeping[rows_2] & ~resting[rows_1]]))
+        for row in woken_rows.tolist():
+            if arrays.sleeping[row]: #might have woken up with an earlier row's island
+                self.wake(arrays.balls[row])
+
+        both_free = ~(arrays.anchored[rows_1] | arrays.anchored[rows_2])
+        self.ball_contacts = (rows_1[both_free], rows_2[both_free])
+
+        for line_index, row in zip(*(array.tolist() for array in line_contacts)):
+            line = self.batched_lines[line_index]
+            if line.anchored and not line.sleeping and getattr(line, "motor", 0) == 0: #walls, almost every line pair ends here
+                continue
+            self.touch(line, arrays.balls[row])
+
+
+    def update_sleeping(self, delta_time:float) -> None:
+        """Times how long every object has been still for and puts groups of touching objects that have all been still long enough to sleep.
+
+        Args:
+            delta_time (float): The amount of time passed since last update.
+        """        
+        threshold = self.sleep_threshold * self.sleep_threshold
+        candidates = []
+        for object in self.all_objects:
+            if object.sleeping or not self.can_sleep(object):
+                continue
+            if (object.position - object.last_position).length_squared() < threshold:
+                object.sleep_timer += delta_time
+            else:
+                object.sleep_timer = 0
+            candidates.append(object)
+
+        parents = {id(object): object for object in candidates} #union find over the contacts
+        
+        def find(object:PhysicsObject) -> PhysicsObject:
+            while parents[id(object)] is not object:
+                parents[id(object)] = parents[id(parents[id(object)])]
+                object = parents[id(object)]
+            return object
+
+        contacts = self.contacts
+        if self.ball_contacts is not None:
+            balls = self.ball_arrays.balls
+            contacts = contacts + [(balls[row_1], balls[row_2]) for row_1, row_2 in zip(self.ball_contacts[0].tolist(), self.ball_contacts[1].tolist())]
+
+        for object_1, object_2 in contacts:
+            if (id(object_1) not in parents) or (id(object_2) not in parents): #sleeping objects work like the ground
+                continue
+            root_1 = find(object_1)
+            root_2 = find(object_2)
+            if root_1 is not root_2:
+                parents[id(root_1)] = root_2
+
+        islands = {}
+        for object in candidates:
+            islands.setdefault(id(find(object)), []).append(object)
+
+        for island in islands.values():
+            if all(object.sleep_timer >= self.sleep_time for object in island):
+                self.sleep(island)
+
+
+    def polygon_collision(self, polygon:Polygon, object:PhysicsObject) -> bool:
+        """Detects and resolves collision between a Polygon and any other object, small Polygon pairs go through SAT and everything else through GJK and EPA.
+
+        Args:
+            polygon (Polygon): Polygon of collision.
+            object (PhysicsObject): Other object of collision.
+
+        Returns:
+            bool: True or false of collision.
+        """        
+        if (type(object) == Polygon) and (len(polygon.point_relatives) <= self.sat_max_points) and (len(object.point_relatives) <= self.sat_max_points):
+            contact = self.sat(polygon, object)
+            if contact is None:
+                return False
+            depth, normal = contact
+
+        else:
+            if not self.gjk(polygon, object):
+                return False
+
+            depth, normal = self.EPA(self.simplex, polygon, object)
+        
+        if depth > self.worst_penetration:
+            self.worst_penetration = depth
+        share = 0.75 if (polygon.anchored or object.anchored) else 0.5 #one visit per pair, see line_on_ball
+        polygon.position -= (share * depth * normal) * (not polygon.anchored)
+        object.position += (share * depth * normal) * (not object.anchored)
+        return True
 
     
+    def sat(self, polygon_1:Polygon, polygon_2:Polygon) -> tuple[float, Vector2]:
+        """Separating axis test between two Polygons using their edge normals, stops at the first axis that separates them.
+
+        Args:
+            polygon_1 (Polygon): Polygon one.
+            polygon_2 (Polygon): Polygon two.
+
+        Returns:
+            tuple[float, Vector2]: Penetration depth and the unit normal to push polygon one back along (and polygon two forwards), None if they don't overlap.
+        """        
+        points_1 = polygon_1.points
+        points_2 = polygon_2.points
+        minimum_depth = math.inf
+        minimum_axis = None
+
+        for polygon in (polygon_1, polygon_2):
+            cos = polygon.rotation_cos
+            sin = polygon.rotation_sin
+            for normal_x, normal_y in polygon.edge_normals:
+                axis = Vector2(cos*normal_x - sin*normal_y, sin*normal_x + cos*normal_y)
+
+                projections_1 = list(map(axis.dot, points_1))
+                projections_2 = list(map(axis.dot, points_2))
+                forwards_depth = max(projections_1) - min(projections_2) #how far polygon one has to move back along the axis to get clear
+                backwards_depth = max(projections_2) - min(projections_1) #same but forwards
+                
+                if (forwards_depth <= 0) or (backwards_depth <= 0):
+                    return None
+                if forwards_depth < minimum_depth:
+                    minimum_depth = forwards_depth
+                    minimum_axis = axis
+                if backwards_depth < minimum_depth:
+                    minimum_depth = backwards_depth
+                    minimum_axis = -axis
+
+        return minimum_depth, minimum_axis
+
+
     def ball_on_ball(self, ball_1:Ball, ball_2:Ball) -> bool:
         """Resolves and detects collisions between two Ball objects.
 
@@ -494,8 +2384,11 @@ class Solver():
             except ZeroDivisionError:
                 n = Vector2()
             delta = ball_1.radius + ball_2.radius - distance
-            ball_1.position += (0.5 * delta * n) * (not ball_1.anchored)
-            ball_2.position -= (0.5 * delta * n) * (not ball_2.anchored)
+            if delta > self.worst_penetration:
+                self.worst_penetration = delta
+            share = 0.75 if (ball_1.anchored or ball_2.anchored) else 0.5 #one visit per pair, see line_on_ball
+            ball_1.position += (share * delta * n) * (not ball_1.anchored)
+            ball_2.position -= (share * delta * n) * (not ball_2.anchored)
             return True
         return False
     
@@ -531,6 +2424,9 @@ class Solver():
         Returns:
             bool: True or false of collision.
         """        
+        #pairs used to get visited both ways round, against an anchored side that added up to 0.5 + 0.25 of the overlap, so one visit pushes 0.75 to keep the response the same
+        share = 0.75 if (line.anchored or ball.anchored) else 0.5
+
         collision_axis = line.points[0] - ball.position
         collision_axis_2 = line.points[1] - ball.position
 
@@ -543,9 +2439,11 @@ class Solver():
             except ZeroDivisionError:
                 n = Vector2()
             delta = ball.radius - distance
-            line.points[0] += (0.5 * delta * n) * (not line.anchored)
-            line.points[1] += (0.5 * delta * n) * (not line.anchored)
-            ball.position -= (0.5 * delta * n) * (not ball.anchored)
+            if delta > self.worst_penetration:
+                self.worst_penetration = delta
+            line.points[0] += (share * delta * n) * (not line.anchored)
+            line.points[1] += (share * delta * n) * (not line.anchored)
+            ball.position -= (share * delta * n) * (not ball.anchored)
             return True
 
         elif (distance_2 < ball.radius):
@@ -554,9 +2452,11 @@ class Solver():
             except ZeroDivisionError:
                 n = Vector2()
             delta = ball.radius - distance_2
-            line.points[0] += (0.5 * delta * n) * (not line.anchored)
-            line.points[1] += (0.5 * delta * n) * (not line.anchored)
-            ball.position -= (0.5 * delta * n) * (not ball.anchored)
+            if delta > self.worst_penetration:
+                self.worst_penetration = delta
+            line.points[0] += (share * delta * n) * (not line.anchored)
+            line.points[1] += (share * delta * n) * (not line.anchored)
+            ball.position -= (share * delta * n) * (not ball.anchored)
             return True
 
         line_length = math.dist(line.points[0], line.points[1])
@@ -580,9 +2480,11 @@ class Solver():
             except ZeroDivisionError:
                 n = Vector2()
             delta = ball.radius - ball_distance
-            line.points[0] += (0.5 * delta * n) * (not line.anchored)
-            line.points[1] += (0.5 * delta * n) * (not line.anchored)
-            ball.position -= (0.5 * delta * n) * (not ball.anchored)
+            if delta > self.worst_penetration:
+                self.worst_penetration = delta
+            line.points[0] += (share * delta * n) * (not line.anchored)
+            line.points[1] += (share * delta * n) * (not line.anchored)
+            ball.position -= (share * delta * n) * (not ball.anchored)
             return True
         
         return False
@@ -748,8 +2650,46 @@ class Solver():
         return resultant
        
     
+    def contains_origin(self, points: list[Vector2]) -> bool:
+        """Checks if a (non flat) triangle has the origin inside it or on an edge."""        
+        point_1, point_2, point_3 = points
+        if (point_2 - point_1).cross(point_3 - point_1) == 0:
+            return False
+        
+        side_1 = (point_2 - point_1).cross(-point_1)
+        side_2 = (point_3 - point_2).cross(-point_2)
+        side_3 = (point_1 - point_3).cross(-point_3)
+        return ((side_1 >= 0) and (side_2 >= 0) and (side_3 >= 0)) or ((side_1 <= 0) and (side_2 <= 0) and (side_3 <= 0))
+
+
     def gjk(self, polygon_1: Polygon, polygon_2: Polygon) -> bool:
-        self.direction = polygon_2.position - polygon_1.position # because it will likely give an extreme point
+        """GJK intersection test, warm started from the pair's result last subset.
+        Separated pairs cache the direction that separated them, which usually separates them again straight away.
+        Touching pairs cache their final simplex, its points get used as directions for a fresh triangle that usually still holds the origin.
+
+        Args:
+            polygon_1 (Polygon): Object one.
+            polygon_2 (Polygon): Object two.
+
+        Returns:
+            bool: If they intersect, self.simplex is left holding the origin for EPA when they do.
+        """        
+        key = (id(polygon_1), id(polygon_2))
+        warm_start = self.last_gjk_cache.get(key)
+
+        if warm_start is None:
+            self.direction = polygon_2.position - polygon_1.position # because it will likely give an extreme point
+        else:
+            self.direction, last_simplex = warm_start
+            if last_simplex is not None:
+                points = [self.find_support(polygon_1, polygon_2, point) for point in last_simplex]
+                if self.contains_origin(points):
+                    self.simplex = Simplex()
+                    self.simplex.points = points
+                    self.simplex.size = 3
+                    self.gjk_cache[key] = (self.direction, points)
+                    return True
+
         # gfxdraw.circle(self.all_objects[0].surface, int(self.direction[0] + 960), int(self.direction[1] + 540), 3, (255, 0, 255))
         support_point = self.find_support(polygon_1, polygon_2, self.direction)
         
@@ -762,6 +2702,10 @@ class Solver():
         # gfxdraw.circle(self.all_objects[0].surface, 960, 540, 2, (0,0,255))
         # gfxdraw.polygon(self.all_objects[0].surface, points, (255, 0, 0))
         
+        if support_point.dot(self.direction) <= 0: #the whole Minkowski difference is behind the origin already
+            self.gjk_cache[key] = (Vector2(self.direction), None)
+            return False
+
         self.simplex = Simplex()
         self.simplex.push_front(support_point)
         
@@ -780,6 +2724,7 @@ class Solver():
             # print(support_point.dot(self.direction))
             if (support_point.dot(self.direction) <= 0):
                 # print("false")
+                self.gjk_cache[key] = (Vector2(self.direction), None)
                 return False
             
             self.simplex.push_front(support_point)
@@ -796,6 +2741,7 @@ class Solver():
             
             if (self.next_simplex(self.simplex.points, self.direction)):
                 # print("collide")
+                self.gjk_cache[key] = (Vector2(self.direction), list(self.simplex.points) if len(self.simplex.points) == 3 else None)
                 return True
             # elif len(self.points) > 3:
             #     break
@@ -829,12 +2775,14 @@ class Solver():
         if self.same_direction(point_1_2, a_negative):
             temp = point_1_2.cross(a_negative).cross(point_1_2)
             self.direction = Vector2(temp[0], temp[1])
+            self.simplex.points = [Vector2(point_1[0], point_1[1]), Vector2(point_2[0], point_2[1])] #triangle() can land here with a point that needs dropping
             # self.direction = a_negative
             
         else:
             self.simplex.points = [Vector2(point_1[0], point_1[1])]
             self.direction = Vector2(a_negative[0], a_negative[1])
             
+        self.simplex.size = len(self.simplex.points)
         return False
     
     
@@ -867,6 +2815,7 @@ class Solver():
                 self.direction = Vector2(temp[0], temp[1])
                 
                 self.simplex.points = [Vector2(point_1[0], point_1[1]), Vector2(point_3[0], point_3[1])]
+                self.simplex.size = 2
 
             else:
                 return self.line([Vector2(point_1[0], point_1[1]), Vector2(point_2[0], point_2[1])], self.direction)
@@ -916,63 +2865,104 @@ class Solver():
         return False
     
     
-    def EPA(self, polytope:Simplex, polygon_1:Polygon, polygon_2:Polygon):
-        minimum_index = 0
-        minimum_distance = math.inf
-        minimum_normal = Vector2(0,0)
-        
-        while minimum_distance == math.inf:
-            for i in range(polytope.size):
-                j = (i + 1) % polytope.size
-                
-                vertex_i = polytope.points[i]
-                vertex_j = polytope.points[j]
-                
-                vertex_i_j = vertex_j - vertex_i
-                try:
-                    normal = Vector2(vertex_i_j[1], -vertex_i_j[0]).normalize()
-                except ValueError:
-                    normal = Vector2(vertex_i_j[1], -vertex_i_j[0])
+    def EPA(self, polytope:Simplex, polygon_1:Polygon, polygon_2:Polygon, max_iterations:int = 32, tolerance:float = 0.01) -> tuple[float, Vector2]:
+        """Expands the simplex GJK finished with until it finds the edge of the Minkowski difference closest to the origin.
+        The response only pushes along the normal, find_contact_points() works out where the objects touch for anything that needs it.
+
+        Args:
+            polytope (Simplex): Simplex holding the origin, gets copied so the GJK cache keeps the original.
+            polygon_1 (Polygon): Object one.
+            polygon_2 (Polygon): Object two.
+            max_iterations (int, optional): Most points to add before giving up and using the closest edge so far. Defaults to 32.
+            tolerance (float, optional): How close the closest edge has to be to the real boundary to stop. Defaults to 0.01.
+
+        Returns:
+            tuple[float, Vector2]: Penetration depth and the unit normal to push object one back along (and object two forwards).
+        """        
+        points = list(polytope.points)
+        minimum_distance = 0
+        minimum_normal = polygon_2.position - polygon_1.position #only used if the polytope is nothing but a point
+
+        for iteration in range(max_iterations):
+            minimum_index = None
+            minimum_distance = math.inf
+            for i in range(len(points)):
+                j = (i + 1) % len(points)
+                vertex_i = points[i]
+                edge = points[j] - vertex_i
+                if edge.length_squared() == 0:
+                    continue
+
+                normal = perpendicular(edge).normalize()
                 distance = normal.dot(vertex_i)
-                
-                # try:
-                #     normal = perpendicular(vertex_i_j).normalize()
-                # except ValueError:
-                #     normal = perpendicular(vertex_i_j)
-                # distance = normal.dot(vertex_i)
-                
-                if distance <= 0:
+                if distance < 0: #the origin is inside so flipping always gets the outwards normal, whatever way round the points go
                     distance *= -1
                     normal *= -1
-                    
                 if distance < minimum_distance:
                     minimum_distance = distance
                     minimum_normal = normal
                     minimum_index = j
-                    
-                #     distance_minimum_i = i
-                #     distance_minimum_j = j
-                    
-                # average = 0.5*(polytope.points[j] + polytope.points[i])
-                
+
+            if minimum_index is None: #every point is the same one
+                minimum_distance = 0
+                break
+
             support = self.find_support(polygon_1, polygon_2, minimum_normal)
-            small_distance = minimum_normal.dot(support)
-                
-            if abs(small_distance - minimum_distance) > 0.001:
-                minimum_distance = math.inf
-                polytope.points.insert(minimum_index, support)
-                
-            # else:
-                # length_i_j = polytope.points[distance_minimum_j] - polytope.points[distance_minimum_i]
-                # length_i_j = Vector3(length_i_j[0], length_i_j[1], 0)
-                # point_i = polytope.points[distance_minimum_i]
-                # point_i = Vector3(point_i[0], point_i[1], 0)
-                
-                
-                
-                # norm = length_i_j.cross(point_i).cross(length_i_j).normalize()
-                # dot = norm.dot(point_i)
-                
-                
-                
-        return minimum_normal * (minimum_distance + 0.001)
\ No newline at end of file
+            if support.dot(minimum_normal) - minimum_distance < tolerance:
+                break
+            points.insert(minimum_index, support)
+
+        try:
+            minimum_normal = minimum_normal.normalize()
+        except ValueError:
+            pass
+        return minimum_distance, minimum_normal
+
+
+    def find_contact_points(self, object_1:PhysicsObject, object_2:PhysicsObject, normal:Vector2, tolerance:float = 0.01) -> list[Vector2]:
+        """Finds where two overlapping objects touch, the deepest point or the two ends of where two flat sides overlap.
+
+        Args:
+            object_1 (PhysicsObject): Object one.
+            object_2 (PhysicsObject): Object two.
+            normal (Vector2): Unit normal pointing from object one towards object two.
+            tolerance (float, optional): How far off the deepest point a point can be and still count as part of the same side. Defaults to 0.01.
+
+        Returns:
+            list[Vector2]: One or two contact points.
+        """        
+        features = []
+        for object, direction in ((object_1, normal), (object_2, -normal)):
+            if type(object) == Ball:
+                features.append([object.support_point(Vector2(direction))])
+                continue
+            
+            extreme = max(point.dot(direction) for point in object.points)
+            features.append([point for point in object.points if point.dot(direction) >= extreme - tolerance])
+
+        feature_1, feature_2 = features
+        if len(feature_2) == 1: #a corner of object two poking into object one
+            return [Vector2(feature_2[0])]
+        if len(feature_1) == 1:
+            return [Vector2(feature_1[0])]
+
+        tangent = perpendicular(normal) #two flat sides, the contact is where they overlap along the tangent
+        projections_1 = [point.dot(tangent) for point in feature_1]
+        projections_2 = [point.dot(tangent) for point in feature_2]
+        lowest = max(min(projections_1), min(projections_2))
+        highest = min(max(projections_1), max(projections_2))
+        
+        overlapping = sorted((point.dot(tangent), index, point) for index, point in enumerate(feature_1 + feature_2) if lowest - tolerance <= point.dot(tangent) <= highest + tolerance)
+        if not overlapping:
+            return [Vector2(feature_2[0])]
+        if len(overlapping) == 1:
+            return [Vector2(overlapping[0][2])]
+        return [Vector2(overlapping[0][2]), Vector2(overlapping[-1][2])]
+
+
+
+Solver.register_collision_handler(Ball, Ball, Solver.ball_on_ball, "Ball/Ball")
+Solver.register_collision_handler(Line, Ball, Solver.line_on_ball, "Line/Ball")
+Solver.register_collision_handler(Polygon, Polygon, Solver.polygon_collision, "GJK/EPA")
+Solver.register_collision_handler(Polygon, Ball, Solver.polygon_collision, "GJK/EPA")
+Solver.register_collision_handler(Polygon, Line, Solver.polygon_collision, "GJK/EPA")
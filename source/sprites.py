@@ -0,0 +1,154 @@
+import pygame
+from pygame import Vector2
+from pygame import gfxdraw
+from solver import PhysicsObject, Ball, Polygon
+from pipeline import BallState, PolygonState
+from collections import OrderedDict
+import math
+
+
+class SpriteCache():
+    """Pre-rendered Ball and Polygon wireframes, so a thousand identical balls cost one rasterisation and a thousand blits.
+    Sprites are keyed on (kind, radius or shape, color, rotation step) and the least recently used ones get dropped once they go over the memory limit.
+    Everything else (Lines, objects that flew off to infinity) still draws itself."""
+
+    def __init__(self, max_bytes:int = 64 * 1024 * 1024, rotation_step:float = 1, background:pygame.Color = (0, 0, 0)) -> None:
+        """Sprite cache.
+
+        Args:
+            max_bytes (int, optional): Most memory the sprites can take up before old ones get dropped. Defaults to 64MB.
+            rotation_step (float, optional): Polygon rotations get rounded to this many degrees, a smaller step looks smoother but keeps more sprites per shape. Defaults to 1.
+            background (pygame.Color, optional): Color the sprites get drawn on and that becomes see through, should match what the surface gets cleared with. Defaults to (0, 0, 0) (black).
+        """
+        self.max_bytes = max_bytes
+        self.rotation_step = rotation_step
+        self.background = background
+        self.sprites = OrderedDict() #key to (sprite, offset from the object's position to the sprite's corner), oldest first
+        self.shapes = {} #id of a polygon's point_relatives to (point_relatives, shape key), set_point_relatives() swaps the list out so the id changes with the shape
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+    def clear(self) -> None:
+        """Drops every sprite."""
+        self.sprites = OrderedDict()
+        self.shapes = {}
+        self.used_bytes = 0
+
+
+    def sprite_key(self, object:PhysicsObject) -> tuple:
+        """Works out the key of the sprite an object draws with.
+
+        Args:
+            object (PhysicsObject): Object to draw.
+
+        Returns:
+            tuple: The key, None if the object doesn't get a sprite.
+        """
+        color = object.color
+        if type(color) is not tuple:
+            color = tuple(color)
+        if isinstance(object, (Ball, BallState)):
+            return (Ball, int(object.radius), color)
+        elif isinstance(object, (Polygon, PolygonState)):
+            point_relatives = object.point_relatives
+            shape = self.shapes.get(id(point_relatives))
+            if shape is None or shape[0] is not point_relatives:
+                if len(self.shapes) > 4096: #polygons getting reshaped all the time, don't hold onto every old shape
+                    self.shapes = {}
+                shape = self.shapes[id(point_relatives)] = (point_relatives, tuple((round(point[0], 2), round(point[1], 2)) for point in point_relatives))
+            shape = shape[1]
+            return (Polygon, shape, color, round(object.rotation / self.rotation_step) % round(360 / self.rotation_step))
+        return None
+
+
+    def render(self, key:tuple) -> tuple[pygame.Surface, tuple[int, int]]:
+        """Rasterises a sprite, same drawing calls as draw_antialiased_wireframe().
+
+        Args:
+            key (tuple): Key made by sprite_key().
+
+        Returns:
+            tuple[pygame.Surface, tuple[int, int]]: The sprite and the offset from the object's position to its top left corner.
+        """
+        if key[0] is Ball:
+            kind, radius, color = key
+            half = radius + 1 #one extra pixel for the antialiasing
+            sprite = pygame.Surface((2 * half + 1, 2 * half + 1))
+            sprite.fill(self.background)
+            gfxdraw.aacircle(sprite, half, half, radius, color)
+        else:
+            kind, shape, color, step = key
+            points = [Vector2(point).rotate(step * self.rotation_step) for point in shape]
+            half = math.ceil(max(point.length() for point in points)) + 1
+            sprite = pygame.Surface((2 * half + 1, 2 * half + 1))
+            sprite.fill(self.background)
+            gfxdraw.aapolygon(sprite, [point + Vector2(half, half) for point in points], color)
+
+        sprite.set_colorkey(self.background, pygame.RLEACCEL)
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert() #same pixel format as the display blits the fastest
+            sprite.set_colorkey(self.background, pygame.RLEACCEL)
+        return sprite, (-half, -half)
+
+
+    def get(self, key:tuple) -> tuple[pygame.Surface, tuple[int, int]]:
+        """Finds a sprite, rendering it if it isn't cached.
+
+        Args:
+            key (tuple): Key made by sprite_key().
+
+        Returns:
+            tuple[pygame.Surface, tuple[int, int]]: The sprite and the offset from the object's position to its top left corner.
+        """
+        entry = self.sprites.get(key)
+        if entry is not None:
+            self.sprites.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = self.sprites[key] = self.render(key)
+        sprite = entry[0]
+        self.used_bytes += sprite.get_width() * sprite.get_height() * sprite.get_bytesize()
+        while self.used_bytes > self.max_bytes and len(self.sprites) > 1:
+            old_sprite = self.sprites.popitem(last=False)[1][0]
+            self.used_bytes -= old_sprite.get_width() * old_sprite.get_height() * old_sprite.get_bytesize()
+        return entry
+
+
+    def draw(self, surface:pygame.Surface, objects:list[tuple[PhysicsObject, Vector2]]) -> None:
+        """Draws objects onto a surface, runs of sprite objects go through one Surface.blits call and everything keeps its draw order.
+
+        Args:
+            surface (pygame.Surface): Surface to draw onto.
+            objects (list[tuple[PhysicsObject, Vector2]]): Objects and the offsets to draw them with (None for none).
+        """
+        frame_sprites = {} #every key only touches the LRU order once per draw
+        blits = []
+        for object, offset in objects:
+            key = self.sprite_key(object)
+            if key is not None:
+                entry = frame_sprites.get(key)
+                if entry is None:
+                    entry = frame_sprites[key] = self.get(key)
+                else:
+                    self.hits += 1
+                x, y = object.position
+                if offset is not None:
+                    x += offset[0]
+                    y += offset[1]
+                try:
+                    blits.append((entry[0], (int(x) + entry[1][0], int(y) + entry[1][1])))
+                    continue
+                except (OverflowError, ValueError): #flew off to infinity, let the object deal with it
+                    pass
+
+            if blits:
+                surface.blits(blits, False)
+                blits = []
+            object.draw_antialiased_wireframe(offset)
+
+        if blits:
+            surface.blits(blits, False)
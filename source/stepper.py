@@ -0,0 +1,67 @@
+from solver import Solver, PhysicsObject
+from pygame import Vector2
+
+
+class FixedStepper():
+    """Steps a Solver at a fixed rate no matter how long frames take, so physics and rendering can run at different rates.
+    Leftover time carries over to the next frame and rendering interpolates between the last two steps."""
+
+    def __init__(self, solver:Solver, step_time:float = 1/100, max_steps:int = 5) -> None:
+        """Fixed timestep driver.
+
+        Args:
+            solver (Solver): Solver to step.
+            step_time (float, optional): Length of every step, 1/60 runs physics at 60Hz. Defaults to 1/100.
+            max_steps (int, optional): Most steps to run in one frame, time past that gets dropped so a slow frame can't make the next one even slower. Defaults to 5.
+        """
+        self.solver = solver
+        self.step_time = step_time
+        self.max_steps = max_steps
+        self.accumulator = 0.0 #time that hasn't been stepped yet
+        self.previous_positions = {} #object to its position before the last step
+
+
+    def advance(self, elapsed:float) -> int:
+        """Adds a frame's worth of real time and runs as many steps as fit into it.
+
+        Args:
+            elapsed (float): Real time since the last call, in seconds.
+
+        Returns:
+            int: Amount of steps that ran, can be 0 when frames are shorter than steps.
+        """
+        self.accumulator += elapsed
+        steps = 0
+        while self.accumulator >= self.step_time:
+            if steps == self.max_steps: #spiral of death, give up on catching up
+                self.accumulator %= self.step_time
+                break
+
+            solver = self.solver
+            self.previous_positions = {object: Vector2(object.position) for object in solver.grav_objects + solver.no_grav_objects}
+            solver.update(self.step_time)
+            self.accumulator -= self.step_time
+            steps += 1
+
+        return steps
+
+
+    @property
+    def alpha(self) -> float:
+        """How far into the next step the leftover time is, 0 to 1."""
+        return self.accumulator / self.step_time
+
+
+    def render_offset(self, object:PhysicsObject) -> Vector2:
+        """Works out how far to move an object when drawing it so it sits alpha of the way from its previous position to its current one.
+
+        Args:
+            object (PhysicsObject): Object to draw.
+
+        Returns:
+            Vector2: Offset for draw_antialiased_wireframe(), None for objects that weren't there before the last step.
+        """
+        previous_position = self.previous_positions.get(object)
+        if previous_position is None:
+            return None
+        return (previous_position - object.position) * (1 - self.alpha)
@@ -0,0 +1,5 @@
+import os
+import sys
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") #nothing here opens a window, but pygame shouldn't try to find a display either
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source")) #the modules import each other by name, like when running main.py from source/
@@ -0,0 +1,36 @@
+import pytest
+from pygame import Vector2
+from solver import Solver
+from scenes import SCENES
+
+
+def settled_pile(backend:str) -> Solver:
+    if backend == "arrays":
+        pytest.importorskip("numpy")
+    grav_objects, no_grav_objects = SCENES["ball_box"](800, 600, 40)
+    solver = Solver(grav_objects, no_grav_objects, backend=backend, broadphase="spatial_hash", sleep_time=0.5)
+    for step in range(500): #the objects backend falls asleep after about 370 steps, the arrays one after about 270
+        solver.update(1/100)
+    return solver
+
+
+@pytest.mark.parametrize("backend", ["objects", "arrays"])
+def test_pile_falls_asleep(backend):
+    solver = settled_pile(backend)
+    assert all(ball.sleeping for ball in solver.grav_objects)
+
+    positions = [tuple(ball.position) for ball in solver.grav_objects]
+    for step in range(20):
+        solver.update(1/100)
+    assert [tuple(ball.position) for ball in solver.grav_objects] == positions
+
+
+@pytest.mark.parametrize("backend", ["objects", "arrays"])
+def test_moved_ball_wakes(backend):
+    solver = settled_pile(backend)
+    ball = max(solver.grav_objects, key=lambda ball: ball.position[1]) #one at the bottom, so something rests on it
+    ball.position = ball.position + Vector2(0, -30)
+    solver.update(1/100)
+
+    assert not ball.sleeping
+    assert any(not other.sleeping for other in solver.grav_objects if other is not ball) #its island woke up with it
@@ -0,0 +1,99 @@
+import pytest
+from pygame import Vector2
+from solver import Solver, Ball, Line, Polygon
+import snapshot
+
+BACKENDS = ["objects", "arrays"]
+
+
+def make_solver(backend:str) -> Solver:
+    grav_objects = [Ball(None, Vector2(100 + 30*index, 100), 10) for index in range(5)]
+    grav_objects.append(Polygon(None, Vector2(400, 100), radius=20, point_amount=5))
+    no_grav_objects = [Line(None, Vector2(400, 500), [Vector2(0, 500), Vector2(800, 500)], anchored=True),
+                       Polygon(None, Vector2(600, 300), radius=40, point_amount=4, anchored=True, motor=0.5)]
+    return Solver(grav_objects, no_grav_objects, backend=backend, broadphase="spatial_hash")
+
+
+def state(solver:Solver) -> list[tuple]:
+    return [(tuple(object.position), tuple(object.last_position), getattr(object, "rotation", 0)) for object in solver.grav_objects + solver.no_grav_objects]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_restore_round_trip(backend):
+    solver = make_solver(backend)
+    for step in range(20):
+        solver.update(1/100)
+    data = snapshot.dump(solver)
+    saved = state(solver)
+
+    for step in range(20):
+        solver.update(1/100)
+    assert state(solver) != saved
+
+    snapshot.restore(solver, data)
+    assert state(solver) == saved
+    assert snapshot.dump(solver) == data
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_build_matches_dump(backend):
+    solver = make_solver(backend)
+    for step in range(10):
+        solver.update(1/100)
+    data = snapshot.dump(solver)
+    assert snapshot.dump(snapshot.build(data, backend=backend, broadphase="spatial_hash")) == data
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_ball_added_since_last_update(backend):
+    solver = make_solver(backend)
+    solver.update(1/100)
+    solver.grav_objects.insert(0, Ball(None, Vector2(700, 100), 10)) #no BallArrays row until the next update()
+    data = snapshot.dump(solver)
+    saved = state(solver)
+
+    solver.update(1/100)
+    snapshot.restore(solver, data)
+    assert state(solver) == saved
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_restore_flags_and_colors(backend):
+    solver = make_solver(backend)
+    solver.update(1/100)
+    data = snapshot.dump(solver)
+    ball = solver.grav_objects[0]
+    line = solver.no_grav_objects[0]
+
+    ball.anchored = True
+    ball.color = (1, 2, 3)
+    line.anchored = False
+    solver.update(1/100)
+    snapshot.restore(solver, data)
+
+    assert not ball.anchored
+    assert tuple(ball.color)[:3] == (200, 200, 200)
+    assert line.anchored
+    if solver.ball_arrays is not None:
+        assert not solver.ball_arrays.anchored[ball.row]
+
+
+def test_restore_rejects_other_worlds():
+    solver = make_solver("objects")
+    data = snapshot.dump(solver)
+
+    solver.no_grav_objects.insert(0, solver.grav_objects.pop()) #same objects in the same order, but the polygon lost its gravity
+    with pytest.raises(ValueError):
+        snapshot.restore(solver, data)
+
+    solver.grav_objects.pop(0)
+    with pytest.raises(ValueError):
+        snapshot.restore(solver, data)
+
+
+def test_read_rejects_broken_files():
+    data = snapshot.dump(make_solver("objects"))
+    with pytest.raises(ValueError):
+        snapshot.read(data[:-1])
+    with pytest.raises(ValueError):
+        snapshot.read(b"NOPE" + data[4:])